@@ -1,19 +1,52 @@
+import os
 from flask import Flask
 from flask_login import LoginManager
+from flask_migrate import Migrate
 from app.config import Config
 from app.models import db
+from app.services.directory import directory
+from app.services.settings import settings_store
+from app.services.writer import attendance_writer
+from app.services.qrcodes import qr_renderer
+from app.services.counters import dashboard_counters
+from app.services.identity import user_cache
+from app.services.archive import attendance_archive
+from app.services.events import live_feed
+from app.services.metrics import metrics
+from app.services.roster import roster_sync
+from app.services.debounce import scan_debouncer
+from app.services.class_report import class_report
 
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 login_manager.login_message = 'Silakan login untuk mengakses halaman ini.'
 
-def create_app():
+migrate = Migrate()
+
+# Folder migrasi Alembic di root repository, tidak bergantung pada working directory
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     # Initialize extensions
     db.init_app(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
     login_manager.init_app(app)
+    directory.init_app(app)
+    settings_store.init_app(app)
+    attendance_writer.init_app(app)
+    qr_renderer.init_app(app)
+    dashboard_counters.init_app(app)
+    user_cache.init_app(app)
+    attendance_archive.init_app(app)
+    live_feed.init_app(app)
+    roster_sync.init_app(app)
+    scan_debouncer.init_app(app)
+    class_report.init_app(app)
+    if app.config['METRICS_ENABLED']:
+        metrics.init_app(app)
     
     # Register blueprints
     from app.views.auth import auth_bp
@@ -28,20 +61,8 @@ def create_app():
     from app.views.reports import reports_bp
     app.register_blueprint(reports_bp)
     
-    # Create tables
-    with app.app_context():
-        db.create_all()
-        
-        # Create default super admin if not exists
-        from app.models.user import User
-        if not User.query.filter_by(role='super_admin').first():
-            super_admin = User(
-                username='superadmin',
-                email='superadmin@example.com',
-                role='super_admin'
-            )
-            super_admin.set_password('password')
-            db.session.add(super_admin)
-            db.session.commit()
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
     
     return app
\ No newline at end of file
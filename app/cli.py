@@ -0,0 +1,154 @@
+import click
+from datetime import date
+from flask import current_app
+from flask.cli import AppGroup
+from flask_migrate import upgrade
+from sqlalchemy.exc import IntegrityError
+from app.models import db
+from app.models.attendance import Attendance
+from app.models.person import Person
+from app.models.presence import DailyPresence
+from app.models.rollup import AttendanceRollup
+from app.models.user import User
+from app.services import partitions
+from app.services.archive import attendance_archive
+from app.services.directory import directory
+
+def _superadmin_options(command):
+    command = click.option('--password', envvar='SUPERADMIN_PASSWORD',
+                           help='Default: ditanyakan, atau dari env SUPERADMIN_PASSWORD.')(command)
+    command = click.option('--email', default='superadmin@example.com', show_default=True)(command)
+    return click.option('--username', default='superadmin', show_default=True)(command)
+
+def _seed_superadmin(username, email, password):
+    if User.query.filter_by(role='super_admin').first():
+        click.echo('Super admin sudah ada, tidak ada yang dibuat.')
+        return
+    if not password:
+        password = click.prompt(f'Password untuk {username}', hide_input=True, confirmation_prompt=True)
+    
+    super_admin = User(username=username, email=email, role='super_admin')
+    super_admin.set_password(password)
+    db.session.add(super_admin)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Proses lain membuat user yang sama lebih dulu
+        db.session.rollback()
+        click.echo(f'User {username} sudah ada, tidak ada yang dibuat.')
+        return
+    click.echo(f'Super admin {username} dibuat.')
+
+@click.command('seed-superadmin')
+@_superadmin_options
+def seed_superadmin(username, email, password):
+    """Buat akun super admin jika belum ada satu pun."""
+    _seed_superadmin(username, email, password)
+
+@click.command('init-db')
+@_superadmin_options
+def init_db(username, email, password):
+    """Terapkan semua migrasi lalu buat super admin jika belum ada.
+
+    Database lama yang dibuat oleh db.create_all() juga cukup memakai perintah
+    ini (atau "flask db upgrade"): revisi awal mengenali tabel yang sudah ada,
+    lalu revisi berikutnya menambahkan kolom, tabel dan indeks baru beserta
+    pengisian datanya.
+    """
+    upgrade()
+    click.echo('Skema database sudah versi terbaru.')
+    _seed_superadmin(username, email, password)
+
+people_cli = AppGroup('people', help='Kelola indeks gabungan guru dan siswa.')
+
+@people_cli.command('sync')
+def sync_people():
+    """Bangun ulang tabel people dan isi person_id absensi lama."""
+    Person.rebuild()
+    db.session.commit()
+    directory.clear()
+    click.echo(f'Indeks people tersinkron: {Person.query.count()} orang.')
+
+attendance_cli = AppGroup('attendance', help='Pemeliharaan data absensi.')
+
+@attendance_cli.command('rebuild-aggregates')
+@click.option('--start', 'start_day', type=click.DateTime(formats=['%Y-%m-%d']), required=True,
+              help='Tanggal awal (YYYY-MM-DD).')
+@click.option('--end', 'end_day', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Tanggal akhir (YYYY-MM-DD), default hari ini.')
+def rebuild_aggregates(start_day, end_day):
+    """Bangun ulang presensi harian dan rekap harian dari tabel attendances."""
+    start_day = start_day.date()
+    end_day = end_day.date() if end_day else date.today()
+    
+    # Baris absensi tahun yang sudah diarsipkan tidak ada lagi di database
+    archived_years = attendance_archive.years()
+    if archived_years and start_day.year <= archived_years[-1]:
+        start_day = date(archived_years[-1] + 1, 1, 1)
+        click.echo(f'Tahun {archived_years[-1]} dan sebelumnya sudah diarsipkan, dimulai dari {start_day}.')
+        if start_day > end_day:
+            return
+    
+    DailyPresence.rebuild(start_day, end_day)
+    AttendanceRollup.rebuild(start_day, end_day)
+    db.session.commit()
+    click.echo(f'Presensi dan rekap harian {start_day} s/d {end_day} dibangun ulang.')
+
+@attendance_cli.command('partition')
+@click.option('--months-ahead', type=int, default=None,
+              help='Jumlah bulan ke depan yang partisinya disiapkan.')
+def partition_attendances(months_ahead):
+    """Partisi tabel attendances per bulan (PostgreSQL) dan siapkan partisi bulan mendatang.
+
+    Perintah pertama kali mengubah tabel biasa menjadi tabel berpartisi;
+    selanjutnya cukup dijalankan berkala (misalnya cron bulanan) untuk
+    membuat partisi bulan berikutnya.
+    """
+    if months_ahead is None:
+        months_ahead = current_app.config['ATTENDANCE_PARTITION_MONTHS_AHEAD']
+    if not partitions.supported():
+        click.echo('Partisi tabel hanya tersedia di PostgreSQL. Di database ini laporan memakai indeks '
+                   '(timestamp, id) dan data tahun lama dipindahkan dengan "flask attendance archive".')
+        return
+    
+    if partitions.is_partitioned():
+        created = partitions.ensure_partitions(date.today().replace(day=1), months_ahead)
+    else:
+        created = partitions.convert_to_partitioned(months_ahead)
+        click.echo('Tabel attendances diubah menjadi tabel berpartisi per bulan.')
+    db.session.commit()
+    click.echo(f'{len(created)} partisi baru dibuat.')
+
+def _begin_snapshot():
+    # Baca dan hapus dari snapshot yang sama supaya hanya baris yang sudah diarsipkan yang terhapus
+    isolation_level = {'postgresql': 'REPEATABLE READ', 'sqlite': 'SERIALIZABLE'}.get(db.engine.dialect.name)
+    if isolation_level:
+        db.session.connection(execution_options={'isolation_level': isolation_level})
+
+@attendance_cli.command('archive')
+@click.option('--keep-years', type=int, default=1, show_default=True,
+              help='Jumlah tahun terakhir (termasuk tahun berjalan) yang tetap di database.')
+@click.option('--year', 'years', type=int, multiple=True,
+              help='Arsipkan tahun tertentu saja (boleh diulang).')
+def archive_attendances(keep_years, years):
+    """Pindahkan absensi tahun yang sudah ditutup ke arsip CSV gzip."""
+    cutoff_year = date.today().year - max(keep_years, 1) + 1
+    if not years:
+        first_timestamp = db.session.scalar(db.select(db.func.min(Attendance.timestamp)))
+        years = range(first_timestamp.year, cutoff_year) if first_timestamp else []
+    db.session.rollback()
+    
+    for year in sorted(years):
+        if year >= cutoff_year:
+            click.echo(f'Tahun {year} belum ditutup, dilewati.')
+            continue
+        _begin_snapshot()
+        moved = attendance_archive.archive_year(year, partitions.drop_range)
+        db.session.commit()
+        click.echo(f'Tahun {year}: {moved} baris dipindahkan ke {attendance_archive.directory}.')
+
+def register_commands(app):
+    app.cli.add_command(init_db)
+    app.cli.add_command(seed_superadmin)
+    app.cli.add_command(people_cli)
+    app.cli.add_command(attendance_cli)
@@ -0,0 +1,7 @@
+from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from wtforms import SubmitField
+
+class ImportForm(FlaskForm):
+    file = FileField('File CSV', validators=[FileRequired(), FileAllowed(['csv'], 'Hanya file CSV yang diperbolehkan')])
+    submit = SubmitField('Impor')
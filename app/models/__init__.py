@@ -1,3 +1,43 @@
+from functools import wraps
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.dialects import postgresql, sqlite
 
-db = SQLAlchemy()
\ No newline at end of file
+REPLICA_BIND = 'replica'
+
+class RoutingSession(Session):
+    """Session yang mengarahkan SELECT ke bind replica di dalam view bertanda @read_replica.
+
+    Flush, INSERT/UPDATE/DELETE, dan SELECT ... FOR UPDATE tetap ke primary.
+    Tanpa bind replica (DATABASE_REPLICA_URL kosong) semua query ke primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _reads_from_replica(clause):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _reads_from_replica(clause):
+    if not (has_app_context() and g.get('read_replica')):
+        return False
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+def read_replica(view):
+    """Jalankan query baca view ini di replica; cocok untuk laporan dan daftar yang toleran lag"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def upsert_insert():
+    """Fungsi insert dengan dukungan ON CONFLICT untuk database aktif, atau None jika tidak didukung"""
+    return {
+        'postgresql': postgresql.insert,
+        'sqlite': sqlite.insert,
+    }.get(db.session.get_bind().dialect.name)
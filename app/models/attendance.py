@@ -6,11 +6,20 @@ class Attendance(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     barcode = db.Column(db.String(50), nullable=False)
+    person_id = db.Column(db.Integer, db.ForeignKey('people.id', ondelete='SET NULL'), index=True)
     attendance_type = db.Column(db.String(10), nullable=False)  # 'in' for masuk, 'out' for pulang
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     location = db.Column(db.String(200))  # Lokasi absensi
     status = db.Column(db.String(20), default='on_time')  # 'on_time', 'late', 'early_leave'
     note = db.Column(db.Text)
+    client_scan_id = db.Column(db.String(64))  # ID scan offline dari kiosk, untuk menolak kiriman ulang
+    
+    __table_args__ = (
+        db.Index('ix_attendances_barcode_timestamp', 'barcode', 'timestamp'),
+        db.Index('ix_attendances_timestamp_id', 'timestamp', 'id'),
+        # Menyertakan timestamp karena indeks unik di tabel berpartisi wajib memuat kunci partisi
+        db.Index('ux_attendances_client_scan_id', 'client_scan_id', 'timestamp', unique=True),
+    )
     
     def __repr__(self):
         return f'<Attendance {self.barcode} {self.attendance_type}>'
\ No newline at end of file
@@ -0,0 +1,138 @@
+from sqlalchemy.exc import IntegrityError
+from app.models import db
+from app.models.roster import RosterChange
+from app.models.teacher import Teacher
+from app.models.student import Student
+
+class Person(db.Model):
+    """Indeks gabungan guru dan siswa berdasarkan barcode.
+
+    Setiap guru/siswa punya tepat satu baris di sini sehingga resolusi
+    barcode cukup satu lookup terindeks dan attendances bisa di-join ke
+    nama orangnya melalui person_id. Baris dijaga tetap sinkron oleh view
+    CRUD admin melalui sync() dan remove(), yang juga mencatat perubahannya
+    ke RosterChange untuk sinkronisasi roster kiosk.
+    """
+    __tablename__ = 'people'
+
+    id = db.Column(db.Integer, primary_key=True)
+    barcode = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    person_type = db.Column(db.String(10), nullable=False)  # 'teacher' atau 'student'
+    ref_id = db.Column(db.Integer, nullable=False)          # id pada tabel teachers/students
+
+    __table_args__ = (
+        db.UniqueConstraint('person_type', 'ref_id', name='uq_people_type_ref'),
+    )
+
+    SOURCES = {
+        'teacher': Teacher,
+        'student': Student,
+    }
+
+    @staticmethod
+    def type_of(obj):
+        return 'teacher' if isinstance(obj, Teacher) else 'student'
+
+    @classmethod
+    def sync(cls, obj):
+        """Buat atau perbarui baris Person untuk objek Teacher/Student (tanpa commit)"""
+        if obj.id is None:
+            db.session.flush()
+
+        person_type = cls.type_of(obj)
+        person = cls.query.filter_by(person_type=person_type, ref_id=obj.id).first()
+        if not person:
+            person = cls(person_type=person_type, ref_id=obj.id)
+            db.session.add(person)
+
+        elif person.barcode == obj.barcode and person.name == obj.name:
+            return person
+        elif person.barcode != obj.barcode:
+            RosterChange.record_delete(person.barcode)
+
+        person.barcode = obj.barcode
+        person.name = obj.name
+        RosterChange.record_upsert(person)
+        return person
+
+    @classmethod
+    def remove(cls, obj):
+        """Hapus baris Person milik objek Teacher/Student (tanpa commit)"""
+        query = cls.query.filter_by(person_type=cls.type_of(obj), ref_id=obj.id)
+        for barcode, in query.with_entities(cls.barcode):
+            RosterChange.record_delete(barcode)
+        query.delete()
+
+    @classmethod
+    def rebuild(cls):
+        """Sinkronkan ulang seluruh tabel people dan isi person_id absensi lama.
+
+        Semua langkah berupa statement berbasis himpunan; tidak melakukan commit.
+        """
+        from app.models.attendance import Attendance
+
+        table = cls.__table__
+        for person_type, source in cls.SOURCES.items():
+            # Hapus baris yang sumbernya sudah tidak ada
+            db.session.execute(table.delete().where(
+                table.c.person_type == person_type,
+                table.c.ref_id.not_in(db.select(source.id))
+            ))
+
+            # Perbarui nama dan barcode yang berubah
+            current = db.select(source.name, source.barcode).where(
+                source.id == table.c.ref_id
+            ).correlate(table)
+            db.session.execute(table.update().where(table.c.person_type == person_type).values(
+                name=current.with_only_columns(source.name).scalar_subquery(),
+                barcode=current.with_only_columns(source.barcode).scalar_subquery()
+            ))
+
+            # Tambahkan yang belum punya baris
+            missing = db.select(
+                source.barcode, source.name, db.literal(person_type), source.id
+            ).where(~db.exists().where(
+                table.c.person_type == person_type,
+                table.c.ref_id == source.id
+            ))
+            db.session.execute(table.insert().from_select(
+                ['barcode', 'name', 'person_type', 'ref_id'], missing
+            ))
+
+        # Kiosk wajib mengambil snapshot roster baru
+        RosterChange.record_reset()
+
+        # Isi person_id untuk absensi yang dibuat sebelum tabel people ada
+        attendances = Attendance.__table__
+        db.session.execute(attendances.update().where(
+            attendances.c.person_id.is_(None)
+        ).values(
+            person_id=db.select(table.c.id).where(
+                table.c.barcode == attendances.c.barcode
+            ).scalar_subquery()
+        ))
+
+    @classmethod
+    def backfill_if_empty(cls):
+        """Bangun tabel people jika masih kosong padahal sudah ada guru/siswa.
+
+        Jaring pengaman jika revisi migrasi yang mengisi people dilewati
+        (mis. di-stamp tanpa dijalankan). Melakukan commit sendiri; mengembalikan
+        True jika backfill dijalankan.
+        """
+        if db.session.query(db.select(cls.id).exists()).scalar():
+            return False
+        if not any(db.session.query(db.select(source.id).exists()).scalar() for source in cls.SOURCES.values()):
+            return False
+
+        try:
+            cls.rebuild()
+            db.session.commit()
+        except IntegrityError:
+            # Worker lain mengisi tabel pada saat yang sama
+            db.session.rollback()
+        return True
+
+    def __repr__(self):
+        return f'<Person {self.person_type} {self.name}>'
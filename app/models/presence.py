@@ -0,0 +1,112 @@
+from app.models import db, upsert_insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, time, timedelta
+
+class DailyPresence(db.Model):
+    """Satu baris per barcode per hari, dipakai untuk menentukan absen masuk/pulang.
+
+    Baris dibuat oleh scan pertama hari itu (absen masuk); scan berikutnya
+    hanya menaikkan scan_count. Keputusan masuk/pulang cukup membaca hasil
+    upsert pada kunci unik (barcode, day) sehingga biayanya tidak bergantung
+    pada besar tabel attendances dan aman untuk scan yang bersamaan.
+    """
+    __tablename__ = 'daily_presences'
+
+    id = db.Column(db.Integer, primary_key=True)
+    barcode = db.Column(db.String(50), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    scan_count = db.Column(db.Integer, default=1, nullable=False)
+    check_in_time = db.Column(db.DateTime, nullable=False)     # Waktu absen masuk
+    check_in_status = db.Column(db.String(20), nullable=False)  # 'on_time' atau 'late'
+    last_scan_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('barcode', 'day', name='uq_daily_presences_barcode_day'),
+        db.Index('ix_daily_presences_day', 'day'),
+    )
+
+    @classmethod
+    def register_scans(cls, entries):
+        """Catat scan ke tabel presensi dengan upsert dan kembalikan jumlah scan terbaru.
+
+        entries adalah list dict berisi barcode, day, scan_count (jumlah scan
+        yang ditambahkan), check_in_time, check_in_status dan last_scan_at.
+        Hasilnya dict (barcode, day) -> scan_count setelah upsert. Tidak
+        melakukan commit; baris tetap terkunci sampai transaksi pemanggil selesai.
+        """
+        if not entries:
+            return {}
+
+        insert = upsert_insert()
+        if insert is None:
+            return cls._register_scans_fallback(entries)
+
+        table = cls.__table__
+        stmt = insert(table).values(entries)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.barcode, table.c.day],
+            set_={
+                'scan_count': table.c.scan_count + stmt.excluded.scan_count,
+                'last_scan_at': stmt.excluded.last_scan_at,
+            }
+        ).returning(table.c.barcode, table.c.day, table.c.scan_count)
+
+        return {(barcode, day): count for barcode, day, count in db.session.execute(stmt)}
+
+    @classmethod
+    def _register_scans_fallback(cls, entries):
+        # Database tanpa dukungan ON CONFLICT: update dulu, insert jika belum ada
+        table = cls.__table__
+        counts = {}
+        for entry in entries:
+            key_filter = (table.c.barcode == entry['barcode']) & (table.c.day == entry['day'])
+            update = table.update().where(key_filter).values(
+                scan_count=table.c.scan_count + entry['scan_count'],
+                last_scan_at=entry['last_scan_at']
+            )
+            if db.session.execute(update).rowcount == 0:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(table.insert().values(**entry))
+                except IntegrityError:
+                    # Scan lain membuat baris lebih dulu
+                    db.session.execute(update)
+
+            counts[(entry['barcode'], entry['day'])] = db.session.execute(
+                db.select(table.c.scan_count).where(key_filter)
+            ).scalar()
+        return counts
+
+    @classmethod
+    def rebuild(cls, start_day, end_day):
+        """Bangun ulang presensi harian dari tabel attendances untuk rentang tanggal (inklusif).
+
+        Dipakai untuk mengisi data sebelum tabel ini ada. Tidak melakukan commit.
+        """
+        from app.models.attendance import Attendance
+
+        table = cls.__table__
+        db.session.execute(table.delete().where(table.c.day.between(start_day, end_day)))
+
+        day = db.func.date(Attendance.timestamp)
+        check_in_status = db.func.coalesce(db.func.max(db.case(
+            (Attendance.attendance_type == 'in', Attendance.status)
+        )), 'on_time')
+        rows = db.select(
+            Attendance.barcode,
+            day,
+            db.func.count(Attendance.id),
+            db.func.min(Attendance.timestamp),
+            check_in_status,
+            db.func.max(Attendance.timestamp)
+        ).where(
+            Attendance.timestamp >= datetime.combine(start_day, time.min),
+            Attendance.timestamp < datetime.combine(end_day + timedelta(days=1), time.min)
+        ).group_by(Attendance.barcode, day)
+
+        db.session.execute(table.insert().from_select(
+            ['barcode', 'day', 'scan_count', 'check_in_time', 'check_in_status', 'last_scan_at'], rows
+        ))
+
+    def __repr__(self):
+        return f'<DailyPresence {self.barcode} {self.day}>'
@@ -0,0 +1,86 @@
+from app.models import db, upsert_insert
+from datetime import datetime, time, timedelta
+
+class AttendanceRollup(db.Model):
+    """Rekap jumlah absensi per orang per hari, diperbarui setiap scan masuk.
+
+    Rekap harian, bulanan dan tahunan cukup menjumlahkan baris tabel ini
+    dengan GROUP BY sehingga tidak perlu memuat seluruh baris attendances.
+    """
+    __tablename__ = 'attendance_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    barcode = db.Column(db.String(50), nullable=False)
+    person_id = db.Column(db.Integer, db.ForeignKey('people.id', ondelete='SET NULL'))
+    day = db.Column(db.Date, nullable=False)
+    on_time_count = db.Column(db.Integer, default=0, nullable=False)
+    late_count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('barcode', 'day', name='uq_attendance_rollups_barcode_day'),
+        db.Index('ix_attendance_rollups_day_person', 'day', 'person_id'),
+    )
+
+    @classmethod
+    def add_counts(cls, entries):
+        """Tambahkan jumlah tepat waktu/terlambat dengan upsert (tanpa commit).
+
+        entries adalah list dict berisi barcode, person_id, day, on_time_count
+        dan late_count yang akan ditambahkan ke baris yang sudah ada.
+        """
+        if not entries:
+            return
+
+        table = cls.__table__
+        insert = upsert_insert()
+        if insert is None:
+            # Database tanpa dukungan ON CONFLICT
+            for entry in entries:
+                updated = db.session.execute(table.update().where(
+                    table.c.barcode == entry['barcode'],
+                    table.c.day == entry['day']
+                ).values(
+                    on_time_count=table.c.on_time_count + entry['on_time_count'],
+                    late_count=table.c.late_count + entry['late_count']
+                )).rowcount
+                if not updated:
+                    db.session.execute(table.insert().values(**entry))
+            return
+
+        stmt = insert(table).values(entries)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.barcode, table.c.day],
+            set_={
+                'on_time_count': table.c.on_time_count + stmt.excluded.on_time_count,
+                'late_count': table.c.late_count + stmt.excluded.late_count,
+                'person_id': db.func.coalesce(stmt.excluded.person_id, table.c.person_id),
+            }
+        ))
+
+    @classmethod
+    def rebuild(cls, start_day, end_day):
+        """Bangun ulang rekap dari tabel attendances untuk rentang tanggal (inklusif), tanpa commit"""
+        from app.models.attendance import Attendance
+
+        table = cls.__table__
+        db.session.execute(table.delete().where(table.c.day.between(start_day, end_day)))
+
+        day = db.func.date(Attendance.timestamp)
+        on_time = db.func.sum(db.case((Attendance.status == 'on_time', 1), else_=0))
+        rows = db.select(
+            Attendance.barcode,
+            db.func.max(Attendance.person_id),
+            day,
+            on_time,
+            db.func.count(Attendance.id) - on_time
+        ).where(
+            Attendance.timestamp >= datetime.combine(start_day, time.min),
+            Attendance.timestamp < datetime.combine(end_day + timedelta(days=1), time.min)
+        ).group_by(Attendance.barcode, day)
+
+        db.session.execute(table.insert().from_select(
+            ['barcode', 'person_id', 'day', 'on_time_count', 'late_count'], rows
+        ))
+
+    def __repr__(self):
+        return f'<AttendanceRollup {self.barcode} {self.day}>'
@@ -0,0 +1,34 @@
+from datetime import datetime
+from app.models import db
+
+class RosterChange(db.Model):
+    """Log perubahan indeks people untuk sinkronisasi roster kiosk.
+
+    id yang terus naik menjadi nomor versi roster. Setiap kali barcode
+    dibuat/diubah ('upsert') atau dihapus ('delete') satu baris ditambahkan;
+    'reset' berarti tabel people dibangun ulang sehingga kiosk harus
+    mengambil snapshot baru.
+    """
+    __tablename__ = 'roster_changes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    action = db.Column(db.String(10), nullable=False)  # 'upsert', 'delete', atau 'reset'
+    barcode = db.Column(db.String(50))
+    name = db.Column(db.String(100))
+    person_type = db.Column(db.String(10))
+    changed_at = db.Column(db.DateTime, default=datetime.now, nullable=False, index=True)
+
+    @classmethod
+    def record_upsert(cls, person):
+        db.session.add(cls(action='upsert', barcode=person.barcode, name=person.name, person_type=person.person_type))
+
+    @classmethod
+    def record_delete(cls, barcode):
+        db.session.add(cls(action='delete', barcode=barcode))
+
+    @classmethod
+    def record_reset(cls):
+        db.session.add(cls(action='reset'))
+
+    def __repr__(self):
+        return f'<RosterChange {self.id} {self.action} {self.barcode}>'
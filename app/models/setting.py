@@ -9,6 +9,7 @@ class Setting(db.Model):
     attendance_end_time = db.Column(db.Time, default=time(16, 0))   # Jam pulang: 16:00
     late_time = db.Column(db.Time, default=time(7, 15))            # Terlambat setelah: 07:15
     must_present_for_leave = db.Column(db.Boolean, default=True)    # Harus absen masuk sebelum bisa absen pulang
+    version = db.Column(db.Integer, default=1, nullable=False)      # Dinaikkan setiap kali pengaturan disimpan
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     
@@ -15,5 +15,17 @@ class Student(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     
+    # Indeks untuk daftar admin: urutan (name, id) untuk keyset pagination dan
+    # pencarian awalan nama/NIS. Operator class text_pattern_ops membuat
+    # LIKE 'abc%' bisa memakai indeks di PostgreSQL apa pun collation-nya.
+    __table_args__ = (
+        db.Index('ix_students_name_id', 'name', 'id'),
+        db.Index('ix_students_class_name_name_id', 'class_name', 'name', 'id'),
+        db.Index('ix_students_lower_name_pattern', db.func.lower(name).label('lower_name'),
+                 postgresql_ops={'lower_name': 'text_pattern_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_students_nis_pattern', 'nis',
+                 postgresql_ops={'nis': 'text_pattern_ops'}).ddl_if(dialect='postgresql'),
+    )
+    
     def __repr__(self):
         return f'<Student {self.name}>'
\ No newline at end of file
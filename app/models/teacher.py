@@ -14,5 +14,16 @@ class Teacher(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     
+    # Indeks untuk daftar admin: urutan (name, id) untuk keyset pagination dan
+    # pencarian awalan nama/NIP. Operator class text_pattern_ops membuat
+    # LIKE 'abc%' bisa memakai indeks di PostgreSQL apa pun collation-nya.
+    __table_args__ = (
+        db.Index('ix_teachers_name_id', 'name', 'id'),
+        db.Index('ix_teachers_lower_name_pattern', db.func.lower(name).label('lower_name'),
+                 postgresql_ops={'lower_name': 'text_pattern_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_teachers_nip_pattern', 'nip',
+                 postgresql_ops={'nip': 'text_pattern_ops'}).ddl_if(dialect='postgresql'),
+    )
+    
     def __repr__(self):
         return f'<Teacher {self.name}>'
\ No newline at end of file
@@ -0,0 +1,245 @@
+import csv
+import gzip
+import heapq
+import json
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from app.models import db
+from app.models.attendance import Attendance
+from app.models.person import Person
+
+ARCHIVE_COLUMNS = [
+    'id', 'timestamp', 'barcode', 'person_id', 'name', 'person_type',
+    'attendance_type', 'status', 'location', 'note',
+]
+
+# Bentuk baris sama dengan hasil query laporan sehingga bisa digabung langsung
+ArchivedAttendance = namedtuple('ArchivedAttendance', ARCHIVE_COLUMNS)
+
+SUMMARY_FILENAME = 'summary.json'
+
+def next_month(month):
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+def month_starts(start, end):
+    """Awal bulan (date) untuk setiap bulan yang beririsan dengan [start, end)"""
+    month = date(start.year, start.month, 1)
+    while month < end:
+        yield month
+        month = next_month(month)
+
+def _day_start(day):
+    return datetime.combine(day, time.min)
+
+def _parse_row(record):
+    return ArchivedAttendance(
+        id=int(record[0]),
+        timestamp=datetime.fromisoformat(record[1]),
+        barcode=record[2],
+        person_id=int(record[3]) if record[3] else None,
+        name=record[4] or None,
+        person_type=record[5] or None,
+        attendance_type=record[6],
+        status=record[7] or None,
+        location=record[8] or None,
+        note=record[9] or None,
+    )
+
+def _format_row(row):
+    return [
+        row.id, row.timestamp.isoformat(sep=' '), row.barcode,
+        '' if row.person_id is None else row.person_id,
+        row.name or '', row.person_type or '', row.attendance_type,
+        row.status or '', row.location or '', row.note or '',
+    ]
+
+def _sort_key(row):
+    return row.timestamp, row.id
+
+class AttendanceArchive:
+    """Arsip dingin absensi untuk tahun yang sudah ditutup.
+
+    Setiap tahun disimpan di ATTENDANCE_ARCHIVE_DIR/<tahun>/ sebagai satu file
+    CSV gzip per bulan (terurut berdasarkan timestamp, id) dan summary.json
+    berisi jumlah baris per hari. summary.json ditulis paling akhir dan
+    menjadi penanda bahwa arsip tahun tersebut lengkap.
+
+    Laporan menggabungkan baris arsip dengan baris di database, sehingga data
+    yang sudah diarsipkan tetap bisa dibaca. Pembacaan arsip hanya membuka
+    file bulan yang beririsan dengan rentang laporan.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self._summaries = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.get('ATTENDANCE_ARCHIVE_DIR') or os.path.join(app.instance_path, 'archive')
+        self._summaries = {}
+        app.extensions['attendance_archive'] = self
+
+    def _year_dir(self, year):
+        return os.path.join(self.directory, str(year))
+
+    def _month_path(self, month):
+        return os.path.join(self._year_dir(month.year), f'attendances-{month:%Y-%m}.csv.gz')
+
+    def years(self):
+        """Tahun yang arsipnya lengkap"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            int(name) for name in os.listdir(self.directory)
+            if name.isdigit() and os.path.exists(os.path.join(self.directory, name, SUMMARY_FILENAME))
+        )
+
+    def summary(self, year):
+        path = os.path.join(self._year_dir(year), SUMMARY_FILENAME)
+        try:
+            mtime = os.path.getmtime(path)
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            cached = self._summaries.get(year)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        with open(path) as f:
+            summary = json.load(f)
+        with self._lock:
+            self._summaries[year] = (mtime, summary)
+        return summary
+
+    def covers(self, start, end):
+        """Apakah rentang datetime [start, end) beririsan dengan tahun yang diarsipkan"""
+        return any(start.year <= year <= (end - timedelta(microseconds=1)).year for year in self.years())
+
+    def counts(self, start, end):
+        """(total, tepat waktu) baris arsip pada rentang [start, end) dengan granularitas hari"""
+        total = on_time = 0
+        for year in self.years():
+            if not start.year <= year <= (end - timedelta(microseconds=1)).year:
+                continue
+            for day, (day_total, day_on_time) in self.summary(year)['days'].items():
+                if start <= _day_start(date.fromisoformat(day)) < end:
+                    total += day_total
+                    on_time += day_on_time
+        return total, on_time
+
+    def iter_rows(self, start, end, after=None):
+        """Baris arsip pada rentang [start, end) terurut (timestamp, id).
+
+        after berisi (timestamp, id) dari baris terakhir halaman sebelumnya.
+        """
+        years = set(self.years())
+        for month in month_starts(start.date(), end.date() + timedelta(days=1)):
+            if month.year not in years:
+                continue
+            path = self._month_path(month)
+            if not os.path.exists(path):
+                continue
+            if after is not None and _day_start(next_month(month)) <= after[0]:
+                continue
+
+            with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None)  # header
+                for record in reader:
+                    row = _parse_row(record)
+                    if row.timestamp < start or (after is not None and _sort_key(row) <= after):
+                        continue
+                    if row.timestamp >= end:
+                        return
+                    yield row
+
+    def merge(self, start, end, live_rows, after=None):
+        """Gabungkan baris database (terurut) dengan baris arsip pada rentang yang sama"""
+        if not self.covers(start, end):
+            return iter(live_rows)
+        return heapq.merge(self.iter_rows(start, end, after), live_rows, key=_sort_key)
+
+    def _live_query(self, start, end):
+        return db.select(
+            Attendance.id,
+            Attendance.timestamp,
+            Attendance.barcode,
+            Attendance.person_id,
+            Person.name,
+            Person.person_type,
+            Attendance.attendance_type,
+            Attendance.status,
+            Attendance.location,
+            Attendance.note
+        ).outerjoin(
+            Person, Attendance.person_id == Person.id
+        ).where(
+            Attendance.timestamp >= start,
+            Attendance.timestamp < end
+        ).order_by(Attendance.timestamp, Attendance.id).execution_options(yield_per=2000)
+
+    def archive_year(self, year, drop_rows):
+        """Pindahkan absensi satu tahun dari database ke arsip; kembalikan jumlah baris baru.
+
+        Jika tahun tersebut sudah pernah diarsipkan (misalnya ada scan susulan),
+        isi arsip lama digabung dengan baris baru. drop_rows(start, end) dipanggil
+        untuk menghapus baris dari database dalam transaksi yang sama, lalu
+        file arsip dipasang sebelum commit: jika commit gagal data ada di dua
+        tempat, bukan hilang.
+        """
+        year_dir = self._year_dir(year)
+        os.makedirs(year_dir, exist_ok=True)
+        existing = self.summary(year) or {'rows': 0, 'days': {}}
+        days = dict(existing['days'])
+        written = {}
+        moved = 0
+
+        try:
+            for month in month_starts(date(year, 1, 1), date(year + 1, 1, 1)):
+                start = _day_start(month)
+                end = _day_start(next_month(month))
+                live = list(db.session.execute(self._live_query(start, end)))
+                if not live:
+                    continue
+
+                previous = list(self.iter_rows(start, end)) if year in self.years() else []
+                fd, tmp_path = tempfile.mkstemp(dir=year_dir, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(ARCHIVE_COLUMNS)
+                    for row in heapq.merge(previous, live, key=_sort_key):
+                        writer.writerow(_format_row(row))
+                written[self._month_path(month)] = tmp_path
+
+                for row in live:
+                    day_total, day_on_time = days.get(row.timestamp.date().isoformat(), (0, 0))
+                    days[row.timestamp.date().isoformat()] = (day_total + 1, day_on_time + (row.status == 'on_time'))
+                moved += len(live)
+
+            if not moved:
+                return 0
+
+            drop_rows(_day_start(date(year, 1, 1)), _day_start(date(year + 1, 1, 1)))
+        except BaseException:
+            for tmp_path in written.values():
+                os.remove(tmp_path)
+            raise
+
+        for path, tmp_path in written.items():
+            os.replace(tmp_path, path)
+        summary = {
+            'year': year,
+            'rows': existing['rows'] + moved,
+            'days': dict(sorted(days.items())),
+            'archived_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=year_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, os.path.join(year_dir, SUMMARY_FILENAME))
+        return moved
+
+attendance_archive = AttendanceArchive()
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class LRUCache:
+    """Cache in-memory dengan batas ukuran (LRU) dan masa berlaku opsional"""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, maxsize=None, ttl=None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            self.ttl = ttl
+            self._data.clear()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return None if item is _MISSING else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
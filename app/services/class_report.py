@@ -0,0 +1,134 @@
+from collections import namedtuple
+from datetime import date
+from app.models import db
+from app.models.presence import DailyPresence
+from app.models.student import Student
+from app.services.cache import LRUCache
+
+NO_CLASS = 'Tanpa Kelas'
+
+ClassSummary = namedtuple('ClassSummary', ['class_name', 'students', 'on_time', 'late', 'absent'])
+Absentee = namedtuple('Absentee', ['id', 'nis', 'name', 'class_name', 'absent_days'])
+
+class ClassAttendanceReport:
+    """Rekap kehadiran siswa per kelas dan daftar siswa yang tidak hadir.
+
+    Semua perhitungan dilakukan di database dari DailyPresence (satu baris
+    per barcode per hari yang ada scan-nya): rekap kelas dengan LEFT JOIN dan
+    GROUP BY class_name, daftar tidak hadir dengan anti-join. Hari sekolah
+    adalah hari dalam rentang yang punya minimal satu scan, sehingga libur
+    dan akhir pekan tidak dihitung sebagai tidak hadir. Kelas memakai kelas
+    siswa saat ini.
+
+    Hasil untuk rentang yang sudah ditutup (sebelum hari ini) di-cache selama
+    CLASS_REPORT_CACHE_TTL detik; rentang yang memuat hari ini selalu dihitung
+    ulang. Kunci cache memuat versi data (id presensi terakhir serta jumlah,
+    id terakhir dan waktu ubah terakhir siswa), sehingga scan susulan dari
+    antrean offline dan perubahan data siswa dari worker mana pun langsung
+    membuat cache lama tidak terpakai.
+    """
+
+    def __init__(self):
+        self._cache = LRUCache()
+
+    def init_app(self, app):
+        app.config.setdefault('CLASS_REPORT_CACHE_SIZE', 512)
+        app.config.setdefault('CLASS_REPORT_CACHE_TTL', 3600)
+        self._cache.configure(
+            maxsize=app.config['CLASS_REPORT_CACHE_SIZE'],
+            ttl=app.config['CLASS_REPORT_CACHE_TTL'],
+        )
+        app.extensions['class_report'] = self
+
+    def _version(self):
+        # Satu query ringan: max id memakai primary key, count/max siswa hanya tabel students
+        return db.session.query(
+            db.select(db.func.max(DailyPresence.id)).scalar_subquery(),
+            db.select(db.func.count(Student.id)).scalar_subquery(),
+            db.select(db.func.max(Student.id)).scalar_subquery(),
+            db.select(db.func.max(Student.updated_at)).scalar_subquery(),
+        ).one()
+
+    def _cached(self, key, end_day, compute):
+        if end_day >= date.today():
+            return compute()
+        key = key + tuple(self._version())
+        result = self._cache.get(key)
+        if result is None:
+            result = compute()
+            self._cache.set(key, result)
+        return result
+
+    def school_days(self, start_day, end_day):
+        """Jumlah hari pada [start_day, end_day] yang punya minimal satu scan"""
+        return self._cached(('days', start_day, end_day), end_day,
+                            lambda: self._school_days(start_day, end_day))
+
+    def _school_days(self, start_day, end_day):
+        return db.session.query(
+            db.func.count(db.distinct(DailyPresence.day))
+        ).filter(DailyPresence.day.between(start_day, end_day)).scalar() or 0
+
+    def summary(self, start_day, end_day):
+        """(jumlah hari sekolah, list ClassSummary terurut nama kelas)"""
+        return self._cached(('summary', start_day, end_day), end_day,
+                            lambda: self._summary(start_day, end_day))
+
+    def _summary(self, start_day, end_day):
+        days = self._school_days(start_day, end_day)
+        class_name = db.func.coalesce(Student.class_name, NO_CLASS)
+        rows = db.session.query(
+            class_name,
+            db.func.count(db.distinct(Student.id)),
+            db.func.count(db.case((DailyPresence.check_in_status == 'on_time', 1))),
+            db.func.count(db.case((DailyPresence.check_in_status == 'late', 1)))
+        ).select_from(Student).outerjoin(DailyPresence, db.and_(
+            DailyPresence.barcode == Student.barcode,
+            DailyPresence.day.between(start_day, end_day)
+        )).group_by(class_name).order_by(class_name)
+
+        return days, [
+            ClassSummary(name, students, on_time, late, max(students * days - on_time - late, 0))
+            for name, students, on_time, late in rows
+        ]
+
+    def absentees(self, start_day, end_day, class_name=None):
+        """List Absentee: siswa dengan minimal satu hari sekolah tanpa scan pada rentang tersebut"""
+        return self._cached(('absentees', start_day, end_day, class_name), end_day,
+                            lambda: self._absentees(start_day, end_day, class_name))
+
+    def _absentees(self, start_day, end_day, class_name):
+        days = self._school_days(start_day, end_day)
+        if not days:
+            return []
+
+        if start_day == end_day:
+            # Satu hari: anti-join langsung ke kunci unik (barcode, day)
+            query = db.session.query(
+                Student.id, Student.nis, Student.name, Student.class_name, db.literal(1)
+            ).filter(~db.exists().where(
+                DailyPresence.barcode == Student.barcode,
+                DailyPresence.day == start_day
+            ))
+        else:
+            present_days = db.func.count(DailyPresence.id)
+            query = db.session.query(
+                Student.id, Student.nis, Student.name, Student.class_name, days - present_days
+            ).outerjoin(DailyPresence, db.and_(
+                DailyPresence.barcode == Student.barcode,
+                DailyPresence.day.between(start_day, end_day)
+            )).group_by(
+                Student.id, Student.nis, Student.name, Student.class_name
+            ).having(present_days < days)
+
+        if class_name == NO_CLASS:
+            query = query.filter(Student.class_name.is_(None))
+        elif class_name:
+            query = query.filter(Student.class_name == class_name)
+
+        return [Absentee(*row) for row in query.order_by(Student.class_name, Student.name, Student.id)]
+
+    def clear(self):
+        self._cache.clear()
+
+class_report = ClassAttendanceReport()
@@ -0,0 +1,119 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+from app.models import db
+from app.models.attendance import Attendance
+from app.models.setting import Setting
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.user import User
+
+# Nama counter total -> model yang dihitung saat rekonsiliasi
+TOTAL_MODELS = {
+    'users': User,
+    'teachers': Teacher,
+    'students': Student,
+    'settings': Setting,
+}
+
+SCAN_COUNTERS = ('in', 'out', 'late')
+
+def count_scans(day):
+    """Jumlah scan masuk, pulang, dan masuk terlambat pada satu hari dari database"""
+    start = datetime.combine(day, datetime.min.time())
+    return tuple(db.session.query(
+        db.func.coalesce(db.func.sum(db.case((Attendance.attendance_type == 'in', 1), else_=0)), 0),
+        db.func.coalesce(db.func.sum(db.case((Attendance.attendance_type == 'out', 1), else_=0)), 0),
+        db.func.coalesce(db.func.sum(db.case(
+            (db.and_(Attendance.attendance_type == 'in', Attendance.status == 'late'), 1), else_=0
+        )), 0)
+    ).filter(
+        Attendance.timestamp >= start,
+        Attendance.timestamp < start + timedelta(days=1)
+    ).one())
+
+class DashboardCounters:
+    """Counter dashboard di memori yang diperbarui secara inkremental.
+
+    Total user/guru/siswa/pengaturan dan jumlah scan hari ini (masuk, pulang,
+    masuk terlambat) dimuat sekali dari database, lalu disesuaikan oleh jalur
+    CRUD admin, impor, dan scan setelah commit berhasil. Karena setiap worker
+    hanya melihat perubahan dari prosesnya sendiri, counter dicocokkan ulang
+    dengan database setiap COUNTERS_RECONCILE_INTERVAL detik dan saat
+    pergantian hari.
+    """
+
+    def __init__(self):
+        self.reconcile_interval = 300
+        self._lock = threading.Lock()
+        self._totals = None
+        self._scans = None
+        self._day = None
+        self._reconciled_at = None
+        self.reconciles = 0
+
+    def init_app(self, app):
+        self.reconcile_interval = app.config.get('COUNTERS_RECONCILE_INTERVAL', 300)
+        app.extensions['dashboard_counters'] = self
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._totals = None
+            self._scans = None
+            self._day = None
+            self._reconciled_at = None
+
+    def get(self):
+        """Snapshot counter (dict); rekonsiliasi dulu jika sudah kedaluwarsa"""
+        today = date.today()
+        with self._lock:
+            fresh = (
+                self._totals is not None
+                and self._day == today
+                and time.monotonic() - self._reconciled_at < self.reconcile_interval
+            )
+            if fresh:
+                return self._snapshot()
+        return self.reconcile()
+
+    def reconcile(self):
+        """Hitung ulang semua counter dari database"""
+        today = date.today()
+        totals = {name: db.session.query(db.func.count(model.id)).scalar() for name, model in TOTAL_MODELS.items()}
+
+        in_count, out_count, late_count = count_scans(today)
+
+        with self._lock:
+            self._totals = totals
+            self._scans = {'in': in_count, 'out': out_count, 'late': late_count}
+            self._day = today
+            self._reconciled_at = time.monotonic()
+            self.reconciles += 1
+            return self._snapshot()
+
+    def adjust(self, name, delta):
+        """Sesuaikan counter total setelah data dibuat (+) atau dihapus (-)"""
+        with self._lock:
+            if self._totals is not None:
+                self._totals[name] += delta
+
+    def record_scans(self, scans, decisions):
+        """Tambahkan scan yang sudah di-commit; scans dan decisions seperti pada apply_scans"""
+        with self._lock:
+            if self._scans is None:
+                return
+            for scan, (attendance_type, status) in zip(scans, decisions):
+                if scan[0].date() != self._day:
+                    continue
+                self._scans[attendance_type] += 1
+                if attendance_type == 'in' and status == 'late':
+                    self._scans['late'] += 1
+
+    def _snapshot(self):
+        snapshot = dict(self._totals)
+        snapshot.update({f'scans_{name}': self._scans[name] for name in SCAN_COUNTERS})
+        snapshot['day'] = self._day
+        return snapshot
+
+dashboard_counters = DashboardCounters()
@@ -0,0 +1,176 @@
+import json
+import threading
+import time
+from app.services.cache import LRUCache
+
+# Hasil claim untuk scan pertama yang belum selesai setelah waktu tunggu habis
+IN_PROGRESS = object()
+
+class _Claim:
+    """Scan pertama untuk satu barcode; scan ulang menunggu hasilnya di sini"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class MemoryDebounceStore:
+    """Jendela debounce per proses"""
+
+    name = 'memory'
+
+    def __init__(self, window, maxsize):
+        self._claims = LRUCache(maxsize=maxsize, ttl=window)
+        self._lock = threading.Lock()
+
+    def claim(self, barcode, wait):
+        """(True, None) jika scan ini yang pertama, atau (False, hasil scan pertama).
+
+        Hasil None berarti scan pertama gagal sehingga pemanggil memproses scan
+        seperti biasa; IN_PROGRESS berarti scan pertama belum selesai setelah
+        wait detik.
+        """
+        with self._lock:
+            claim = self._claims.get(barcode)
+            if claim is None:
+                self._claims.set(barcode, _Claim())
+                return True, None
+        if not claim.done.wait(wait):
+            return False, IN_PROGRESS
+        return False, claim.result
+
+    def complete(self, barcode, result):
+        claim = self._claims.get(barcode)
+        if claim is not None:
+            claim.result = result
+            claim.done.set()
+
+    def release(self, barcode):
+        claim = self._claims.pop(barcode)
+        if claim is not None:
+            claim.done.set()
+
+    def count_suppressed(self):
+        return None
+
+class RedisDebounceStore:
+    """Jendela debounce bersama antar worker/server melalui Redis"""
+
+    name = 'redis'
+    PENDING = '__pending__'
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, url, window, prefix='scan-debounce'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('SCAN_DEBOUNCE_REDIS_URL membutuhkan paket redis (pip install redis)') from e
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._window_ms = max(int(window * 1000), 1)
+        self._prefix = prefix
+
+    def _key(self, barcode):
+        return f'{self._prefix}:{barcode}'
+
+    def claim(self, barcode, wait):
+        key = self._key(barcode)
+        if self._redis.set(key, self.PENDING, nx=True, px=self._window_ms):
+            return True, None
+
+        deadline = time.monotonic() + wait
+        while True:
+            value = self._redis.get(key)
+            if value is None:
+                return False, None
+            if value != self.PENDING:
+                return False, json.loads(value)
+            if time.monotonic() >= deadline:
+                return False, IN_PROGRESS
+            time.sleep(self.POLL_INTERVAL)
+
+    def complete(self, barcode, result):
+        self._redis.set(self._key(barcode), json.dumps(result), xx=True, keepttl=True)
+
+    def release(self, barcode):
+        self._redis.delete(self._key(barcode))
+
+    def count_suppressed(self):
+        return self._redis.incr(f'{self._prefix}:suppressed')
+
+class ScanDebouncer:
+    """Penahan scan ganda sebelum menyentuh database.
+
+    Scanner bisa membaca barcode yang sama beberapa kali dalam satu detik.
+    Scan pertama diproses seperti biasa; scan ulang barcode yang sama dalam
+    SCAN_DEBOUNCE_SECONDS detik mendapat hasil scan pertama (ditandai
+    duplicate: true) tanpa query maupun baris absensi baru. Scan ulang yang
+    datang saat scan pertama masih diproses menunggu hasilnya paling lama
+    SCAN_DEBOUNCE_WAIT detik; jika belum selesai juga, scan ulang dijawab
+    "sedang diproses" (pending: true) tanpa diproses lagi. Jendela disimpan di memori proses, atau di Redis
+    (SCAN_DEBOUNCE_REDIS_URL) supaya berlaku untuk semua worker.
+    """
+
+    def __init__(self):
+        self.window = 0
+        self.wait = 1.0
+        self._store = None
+        self.suppressed = 0
+        self.suppressed_total = None
+
+    def init_app(self, app):
+        self.window = app.config.get('SCAN_DEBOUNCE_SECONDS', 0)
+        self.wait = app.config.get('SCAN_DEBOUNCE_WAIT', 1.0)
+        self.suppressed = 0
+        self.suppressed_total = None
+        app.extensions['scan_debouncer'] = self
+
+        if not self.window:
+            self._store = None
+        elif app.config.get('SCAN_DEBOUNCE_REDIS_URL'):
+            self._store = RedisDebounceStore(app.config['SCAN_DEBOUNCE_REDIS_URL'], self.window)
+        else:
+            self._store = MemoryDebounceStore(self.window, app.config.get('SCAN_DEBOUNCE_CACHE_SIZE', 10000))
+
+    @property
+    def enabled(self):
+        return self._store is not None
+
+    def guard(self, barcode, process):
+        """Jalankan process() untuk scan barcode, kecuali scan ulang dalam jendela debounce"""
+        if self._store is None:
+            return process()
+
+        claimed, previous = self._store.claim(barcode, self.wait)
+        if not claimed:
+            if previous is None:
+                return process()
+            self.suppressed += 1
+            total = self._store.count_suppressed()
+            if total is not None:
+                self.suppressed_total = total
+            if previous is IN_PROGRESS:
+                return {'success': False, 'pending': True, 'duplicate': True,
+                        'message': 'Scan sebelumnya masih diproses, mohon tunggu.'}
+            return dict(previous, duplicate=True)
+
+        try:
+            result = process()
+        except BaseException:
+            self._store.release(barcode)
+            raise
+        # Hanya scan yang berhasil yang ditahan; barcode tidak dikenal tetap dicek ulang
+        if result.get('success'):
+            self._store.complete(barcode, result)
+        else:
+            self._store.release(barcode)
+        return result
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'backend': self._store.name if self._store else None,
+            'window': self.window,
+            'suppressed': self.suppressed,
+            'suppressed_total': self.suppressed if self.suppressed_total is None else self.suppressed_total,
+        }
+
+scan_debouncer = ScanDebouncer()
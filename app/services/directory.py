@@ -0,0 +1,106 @@
+from collections import namedtuple
+from app.models.person import Person
+from app.services.cache import LRUCache
+
+# Data ringkas orang pemilik barcode: type bernilai 'teacher' atau 'student',
+# id adalah id guru/siswa dan person_id adalah id pada tabel people
+PersonEntry = namedtuple('PersonEntry', ['name', 'type', 'id', 'person_id'])
+
+PERSON_TYPE_LABELS = {
+    'teacher': 'Guru',
+    'student': 'Siswa',
+}
+
+class BarcodeDirectory:
+    """Direktori barcode -> orang yang disimpan di memori proses.
+
+    Scan berulang untuk barcode yang sama tidak lagi menyentuh database.
+    View admin wajib memanggil invalidate() setiap kali data guru/siswa
+    dibuat, diubah, atau dihapus. TTL membatasi data basi pada worker lain.
+
+    Cache miss pertama di setiap proses memastikan tabel people sudah terisi
+    (Person.backfill_if_empty), sehingga database lama tidak menolak semua
+    scan hanya karena indeks people belum pernah dibangun.
+    """
+
+    def __init__(self):
+        self._cache = LRUCache()
+        self._people_checked = False
+
+    def init_app(self, app):
+        app.config.setdefault('BARCODE_CACHE_SIZE', 5000)
+        app.config.setdefault('BARCODE_CACHE_TTL', 300)
+        self._cache.configure(
+            maxsize=app.config['BARCODE_CACHE_SIZE'],
+            ttl=app.config['BARCODE_CACHE_TTL'],
+        )
+        self._people_checked = False
+        app.extensions['barcode_directory'] = self
+
+    def resolve(self, barcode):
+        """Kembalikan PersonEntry untuk barcode, atau None jika tidak dikenal"""
+        entry = self._cache.get(barcode)
+        if entry is not None:
+            return entry
+
+        self._ensure_people()
+        entry = self._load(barcode)
+        if entry is not None:
+            self._cache.set(barcode, entry)
+        return entry
+
+    def resolve_many(self, barcodes):
+        """Resolusi banyak barcode sekaligus dengan satu query untuk yang belum ada di cache.
+
+        Mengembalikan dict barcode -> PersonEntry; barcode yang tidak dikenal
+        tidak dimasukkan ke hasil.
+        """
+        found = {}
+        missing = []
+        for barcode in set(barcodes):
+            entry = self._cache.get(barcode)
+            if entry is not None:
+                found[barcode] = entry
+            else:
+                missing.append(barcode)
+
+        if missing:
+            self._ensure_people()
+            for barcode, entry in self._load_many(missing).items():
+                self._cache.set(barcode, entry)
+                found[barcode] = entry
+        return found
+
+    def invalidate(self, barcode):
+        self._cache.pop(barcode)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._cache),
+            'hits': self._cache.hits,
+            'misses': self._cache.misses,
+        }
+
+    def _ensure_people(self):
+        if self._people_checked:
+            return
+        if Person.backfill_if_empty():
+            self._cache.clear()
+        self._people_checked = True
+
+    def _load(self, barcode):
+        person = Person.query.filter_by(barcode=barcode).first()
+        if person:
+            return PersonEntry(person.name, person.person_type, person.ref_id, person.id)
+        return None
+
+    def _load_many(self, barcodes):
+        return {
+            person.barcode: PersonEntry(person.name, person.person_type, person.ref_id, person.id)
+            for person in Person.query.filter(Person.barcode.in_(barcodes))
+        }
+
+directory = BarcodeDirectory()
@@ -0,0 +1,165 @@
+import json
+import queue
+import threading
+import time
+
+class Subscription:
+    """Antrean event milik satu koneksi SSE"""
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # Klien lambat: buang event tertua supaya publisher tidak pernah menunggu
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.dropped += 1
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def get(self, timeout):
+        """Event berikutnya, atau None jika tidak ada event selama timeout detik"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class EventBroker:
+    """Pub/sub untuk feed absensi live.
+
+    Handler scan mempublikasikan event setelah commit; setiap koneksi SSE
+    memiliki antrean terbatas sendiri (LIVE_FEED_QUEUE_SIZE) sehingga klien
+    yang lambat hanya kehilangan event lama tanpa menahan scan. Koneksi yang
+    diam hanya menunggu di antreannya dan tidak menyentuh database.
+
+    Tanpa LIVE_FEED_REDIS_URL event hanya disebar di dalam proses, jadi klien
+    hanya menerima scan yang diproses worker yang sama (cukup untuk satu
+    worker). Dengan Redis setiap event dikirim ke channel bersama dan setiap
+    worker meneruskannya ke koneksi miliknya, sehingga semua dashboard
+    menerima scan dari worker mana pun.
+    """
+
+    def __init__(self):
+        self.queue_size = 100
+        self.max_subscribers = 500
+        self.heartbeat_interval = 15
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._listener = None
+        self.channel = 'live-feed'
+        self.published = 0
+
+    def init_app(self, app):
+        self.queue_size = app.config.get('LIVE_FEED_QUEUE_SIZE', 100)
+        self.max_subscribers = app.config.get('LIVE_FEED_MAX_SUBSCRIBERS', 500)
+        self.heartbeat_interval = app.config.get('LIVE_FEED_HEARTBEAT', 15)
+        self._logger = app.logger
+        self._listener = None
+        app.extensions['live_feed'] = self
+
+        if app.config.get('LIVE_FEED_REDIS_URL'):
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError('LIVE_FEED_REDIS_URL membutuhkan paket redis (pip install redis)') from e
+            self._redis = redis.Redis.from_url(app.config['LIVE_FEED_REDIS_URL'], decode_responses=True)
+        else:
+            self._redis = None
+
+    @property
+    def shared(self):
+        """True jika event disebar ke semua worker melalui Redis"""
+        return self._redis is not None
+
+    @property
+    def has_subscribers(self):
+        if self._redis is None:
+            return bool(self._subscribers)
+        # Koneksi bisa dimiliki worker lain: tanyakan jumlah listener channel ke Redis
+        return self._redis.pubsub_numsub(self.channel)[0][1] > 0
+
+    def subscribe(self):
+        """Subscription baru, atau None jika batas jumlah koneksi tercapai"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(self.queue_size)
+            self._subscribers.add(subscription)
+        if self._redis is not None:
+            self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, name, data):
+        with self._lock:
+            self.published += 1
+        event = format_event(name, data)
+        if self._redis is not None:
+            self._redis.publish(self.channel, event)
+        else:
+            self._deliver(event)
+
+    def _deliver(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def _ensure_listener(self):
+        # Listener dimulai saat koneksi pertama di setiap worker (setelah fork)
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name='live-feed-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        # Teruskan event dari channel Redis ke koneksi SSE di proses ini
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self._deliver(message['data'])
+            except Exception:
+                self._logger.exception('Koneksi feed live ke Redis terputus, mencoba lagi')
+                time.sleep(1)
+
+    def stream(self, subscription, initial=()):
+        """Generator body response text/event-stream untuk satu subscription"""
+        try:
+            yield 'retry: 5000\n\n'
+            for name, data in initial:
+                yield format_event(name, data)
+            while True:
+                event = subscription.get(self.heartbeat_interval)
+                # Komentar heartbeat menjaga koneksi tetap hidup melewati proxy
+                yield event if event is not None else ': heartbeat\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'shared': self._redis is not None,
+                'dropped': sum(subscription.dropped for subscription in self._subscribers),
+            }
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, default=str)}\n\n'
+
+live_feed = EventBroker()
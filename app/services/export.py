@@ -0,0 +1,87 @@
+import csv
+import io
+import re
+import tempfile
+import unicodedata
+from urllib.parse import quote
+from flask import Response, stream_with_context
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Jumlah baris yang dikumpulkan sebelum dikirim ke klien
+CSV_FLUSH_ROWS = 500
+XLSX_CHUNK_SIZE = 64 * 1024
+
+def _iter_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM supaya Excel membaca UTF-8 dengan benar
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % CSV_FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _iter_xlsx(title, header, rows):
+    from openpyxl import Workbook
+
+    # Mode write-only menulis baris langsung ke file sementara, memori tetap kecil
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(XLSX_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+def safe_filename(filename):
+    """Nama file yang hanya berisi huruf/angka (termasuk non-ASCII), '_', '.' dan '-'"""
+    return re.sub(r'[^\w.-]', '_', filename)
+
+def content_disposition(filename):
+    """Header Content-Disposition attachment yang aman untuk nama file apa pun.
+
+    Nama dibersihkan dengan safe_filename(). Nama non-ASCII (mis. nama kelas)
+    dikirim lewat filename* (RFC 5987) dengan cadangan ASCII pada filename
+    untuk klien lama.
+    """
+    filename = safe_filename(filename)
+    fallback = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+    header = f'attachment; filename="{fallback}"'
+    if fallback != filename:
+        header += f"; filename*=UTF-8''{quote(filename, safe='')}"
+    return header
+
+def export_response(fmt, filename, title, header, rows):
+    """Response streaming CSV/XLSX dari iterator baris.
+
+    rows sebaiknya generator yang membaca database per potong (yield_per)
+    sehingga ekspor besar tetap memakai memori konstan. CSV mulai terkirim
+    sejak potongan pertama; XLSX baru bisa dikirim setelah file zip selesai
+    ditulis ke file sementara.
+    """
+    if fmt == 'csv':
+        body = _iter_csv(header, rows)
+    else:
+        body = _iter_xlsx(title, header, rows)
+
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': content_disposition(f'{filename}.{fmt}')}
+    )
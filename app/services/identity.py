@@ -0,0 +1,72 @@
+from collections import namedtuple
+from flask_login import UserMixin
+from app.models import db
+from app.models.user import User
+from app.services.cache import LRUCache
+
+_UserIdentityBase = namedtuple('UserIdentity', ['id', 'username', 'email', 'role', 'active'])
+
+class UserIdentity(UserMixin, _UserIdentityBase):
+    """Snapshot user yang immutable untuk current_user.
+
+    Hanya berisi kolom yang dibutuhkan pengecekan login dan role, sehingga
+    aman dibagi antar request dan thread. Untuk mengubah data user, muat ulang
+    model User dari database.
+    """
+    __slots__ = ()
+
+    @property
+    def is_active(self):
+        return self.active
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email, user.role, bool(user.is_active))
+
+class UserCache:
+    """Cache identitas user untuk user_loader Flask-Login.
+
+    Tanpa cache setiap request yang sudah login menjalankan satu query ke
+    tabel users. Snapshot disimpan selama USER_CACHE_TTL detik dan dihapus
+    saat user diedit, dinonaktifkan atau dihapus. Karena invalidasi hanya
+    berlaku di proses yang melakukannya, TTL dibuat pendek supaya worker lain
+    juga segera melihat perubahan.
+    """
+
+    def __init__(self):
+        self._cache = LRUCache()
+
+    def init_app(self, app):
+        self._cache.configure(
+            maxsize=app.config.get('USER_CACHE_SIZE', 1000),
+            ttl=app.config.get('USER_CACHE_TTL', 60)
+        )
+        app.extensions['user_cache'] = self
+
+    def load(self, user_id):
+        """UserIdentity untuk id, atau None jika user tidak ada atau nonaktif"""
+        identity = self._cache.get(user_id)
+        if identity is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            identity = UserIdentity.from_user(user)
+            self._cache.set(user_id, identity)
+
+        # User nonaktif otomatis keluar dari sesi yang sedang berjalan
+        return identity if identity.active else None
+
+    def invalidate(self, user_id):
+        self._cache.pop(user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._cache),
+            'hits': self._cache.hits,
+            'misses': self._cache.misses,
+        }
+
+user_cache = UserCache()
@@ -0,0 +1,192 @@
+import csv
+import io
+import uuid
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy.exc import DataError, IntegrityError
+from app.models import db
+from app.models.person import Person
+from app.models.roster import RosterChange
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.services.counters import dashboard_counters
+
+RowError = namedtuple('RowError', ['line', 'message'])
+
+class ImportResult:
+    def __init__(self):
+        self.total = 0
+        self.inserted = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.errors.append(RowError(line, message))
+
+# Aturan kolom mengikuti validator pada TeacherForm/StudentForm: (wajib, panjang minimal, panjang maksimal)
+IMPORT_SPECS = {
+    'teacher': {
+        'model': Teacher,
+        'key': 'nip',
+        'columns': {
+            'nip': (True, 6, 20),
+            'name': (True, 2, 100),
+            'phone': (False, 0, 15),
+            'email': (False, 0, 120),
+            'address': (False, 0, None),
+            'barcode': (False, 0, 50),
+        },
+    },
+    'student': {
+        'model': Student,
+        'key': 'nis',
+        'columns': {
+            'nis': (True, 6, 20),
+            'name': (True, 2, 100),
+            'class_name': (False, 0, 50),
+            'phone': (False, 0, 15),
+            'email': (False, 0, 120),
+            'address': (False, 0, None),
+            'barcode': (False, 0, 50),
+        },
+    },
+}
+
+# Nama kolom berbahasa Indonesia yang juga diterima di header CSV
+COLUMN_ALIASES = {
+    'nama': 'name',
+    'nama lengkap': 'name',
+    'kelas': 'class_name',
+    'telepon': 'phone',
+    'no. telepon': 'phone',
+    'alamat': 'address',
+}
+
+def _generate_barcode(taken):
+    while True:
+        barcode = uuid.uuid4().hex[:12]
+        if barcode not in taken:
+            return barcode
+
+def _normalize_header(name):
+    name = (name or '').strip().lower()
+    return COLUMN_ALIASES.get(name, name)
+
+def import_people(person_type, stream, chunk_size=500):
+    """Impor guru/siswa dari file CSV secara streaming.
+
+    Keunikan NIS/NIP dan barcode dicek di memori terhadap satu kali prefetch
+    kunci yang sudah ada. Baris valid dimasukkan per potong (chunk_size)
+    dengan satu statement insert, beserta baris indeks people-nya. Baris yang
+    tidak valid dicatat di hasil tanpa membatalkan baris lain.
+    """
+    spec = IMPORT_SPECS[person_type]
+    model = spec['model']
+    key = spec['key']
+    columns = spec['columns']
+    result = ImportResult()
+
+    # Prefetch kunci yang sudah ada (satu query masing-masing)
+    existing_keys = set(db.session.scalars(db.select(getattr(model, key))))
+    taken_barcodes = set(db.session.scalars(db.union_all(
+        db.select(Teacher.barcode), db.select(Student.barcode)
+    )))
+
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    chunk = []
+    try:
+        if reader.fieldnames is None:
+            result.error(1, 'File CSV kosong.')
+            return result
+        reader.fieldnames = [_normalize_header(name) for name in reader.fieldnames]
+
+        missing = [name for name, (required, _, _) in columns.items() if required and name not in reader.fieldnames]
+        if missing:
+            result.error(1, f"Kolom wajib tidak ditemukan: {', '.join(missing)}")
+            return result
+
+        for row in reader:
+            result.total += 1
+            line = reader.line_num
+
+            values = {}
+            problems = []
+            for name, (required, min_length, max_length) in columns.items():
+                value = (row.get(name) or '').strip()
+                if required and not value:
+                    problems.append(f'{name} wajib diisi')
+                elif value and len(value) < min_length:
+                    problems.append(f'{name} minimal {min_length} karakter')
+                elif max_length and len(value) > max_length:
+                    problems.append(f'{name} maksimal {max_length} karakter')
+                values[name] = value or None
+
+            if not problems and values[key] in existing_keys:
+                problems.append(f'{key.upper()} {values[key]} sudah terdaftar')
+
+            barcode = values['barcode']
+            if barcode and barcode in taken_barcodes:
+                problems.append(f'Barcode {barcode} sudah dipakai')
+
+            if problems:
+                result.error(line, '; '.join(problems))
+                continue
+
+            values['barcode'] = barcode or _generate_barcode(taken_barcodes)
+            existing_keys.add(values[key])
+            taken_barcodes.add(values['barcode'])
+            chunk.append((line, values))
+
+            if len(chunk) >= chunk_size:
+                _insert_chunk(person_type, model, chunk, result)
+                chunk = []
+    except UnicodeDecodeError:
+        # Baris yang sudah terbaca tetap diimpor; sisa file tidak bisa dibaca
+        result.error(reader.line_num + 1, 'File bukan CSV UTF-8; simpan ulang file sebagai "CSV UTF-8".')
+
+    if chunk:
+        _insert_chunk(person_type, model, chunk, result)
+    return result
+
+def _insert_rows(person_type, model, rows):
+    db.session.execute(model.__table__.insert(), rows)
+
+    # Tambahkan ke indeks people dan log roster kiosk dengan INSERT ... SELECT
+    barcodes = [row['barcode'] for row in rows]
+    db.session.execute(Person.__table__.insert().from_select(
+        ['barcode', 'name', 'person_type', 'ref_id'],
+        db.select(model.barcode, model.name, db.literal(person_type), model.id).where(
+            model.barcode.in_(barcodes)
+        )
+    ))
+    db.session.execute(RosterChange.__table__.insert().from_select(
+        ['action', 'barcode', 'name', 'person_type', 'changed_at'],
+        db.select(db.literal('upsert'), model.barcode, model.name, db.literal(person_type),
+                  db.literal(datetime.now())).where(
+            model.barcode.in_(barcodes)
+        )
+    ))
+
+def _insert_chunk(person_type, model, chunk, result):
+    try:
+        _insert_rows(person_type, model, [values for _, values in chunk])
+        db.session.commit()
+        result.inserted += len(chunk)
+        dashboard_counters.adjust(model.__tablename__, len(chunk))
+        return
+    except (IntegrityError, DataError):
+        # Bentrok dengan data yang dibuat bersamaan atau nilai ditolak database:
+        # ulangi per baris untuk menemukan penyebabnya
+        db.session.rollback()
+
+    for line, values in chunk:
+        try:
+            _insert_rows(person_type, model, [values])
+            db.session.commit()
+            result.inserted += 1
+            dashboard_counters.adjust(model.__tablename__, 1)
+        except IntegrityError:
+            db.session.rollback()
+            result.error(line, 'Data bentrok dengan data yang sudah ada')
+        except DataError:
+            db.session.rollback()
+            result.error(line, 'Data ditolak database (format atau panjang nilai tidak valid)')
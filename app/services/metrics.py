@@ -0,0 +1,206 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, abort, current_app, request
+from sqlalchemy import event
+from app.models import db
+
+# Batas bucket histogram (detik untuk latensi, jumlah untuk query)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+class Histogram:
+    """Histogram kumulatif ala Prometheus dengan bucket tetap"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(labels, le=bound)} {cumulative}'
+        yield f'{name}_sum{_labels(labels)} {self.total}'
+        yield f'{name}_count{_labels(labels)} {self.count}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+class Metrics:
+    """Instrumentasi request dan query SQL dengan ekspor format Prometheus.
+
+    Setiap request dicatat ke histogram latensi per (endpoint, method, status)
+    dan histogram jumlah query per endpoint. Query dihitung dan diukur
+    waktunya melalui event before/after_cursor_execute SQLAlchemy di setiap
+    engine. Jika METRICS_QUERY_WARN_THRESHOLD diisi, request yang menjalankan
+    lebih banyak query dari batas tersebut dicatat sebagai warning di log.
+    Nilai disimpan per proses; /metrics menampilkan data worker yang
+    menjawab scrape tersebut. Endpoint /metrics hanya didaftarkan jika
+    METRICS_TOKEN diisi, karena isinya (nama endpoint, trafik, kondisi cache
+    dan antrean) tidak boleh terbuka untuk umum.
+    """
+
+    def __init__(self):
+        self.query_warn_threshold = 0
+        self.token = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._requests = {}
+        self._request_queries = {}
+        self._query_duration = Histogram(LATENCY_BUCKETS)
+        self._collectors = {}
+        self._instrumented = set()
+
+    def init_app(self, app):
+        self.query_warn_threshold = app.config.get('METRICS_QUERY_WARN_THRESHOLD', 0)
+        self.token = app.config.get('METRICS_TOKEN')
+        app.extensions['metrics'] = self
+
+        with app.app_context():
+            for engine in db.engines.values():
+                self.instrument_engine(engine)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        if self.token:
+            app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+        else:
+            app.logger.info('METRICS_TOKEN kosong: endpoint /metrics tidak diaktifkan')
+        _register_service_collectors(self)
+
+    def instrument_engine(self, engine):
+        if id(engine) in self._instrumented:
+            return
+        self._instrumented.add(id(engine))
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def gauge(self, name, help_text, read):
+        """Daftarkan gauge yang nilainya dibaca saat scrape; read() mengembalikan angka.
+
+        Nama yang sama hanya didaftarkan sekali, walaupun create_app dipanggil berulang.
+        """
+        self._collectors[name] = ('gauge', help_text, read)
+
+    def counter(self, name, help_text, read):
+        """Seperti gauge, untuk nilai kumulatif yang hanya bertambah"""
+        self._collectors[name] = ('counter', help_text, read)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+        with self._lock:
+            self._query_duration.observe(elapsed)
+        if getattr(self._local, 'started', None) is not None:
+            self._local.queries += 1
+            self._local.query_time += elapsed
+
+    def _before_request(self):
+        self._local.started = time.perf_counter()
+        self._local.queries = 0
+        self._local.query_time = 0.0
+
+    def _after_request(self, response):
+        self._record(response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request tidak dipanggil jika view melempar exception
+        if exc is not None:
+            self._record(500)
+
+    def _record(self, status):
+        started = getattr(self._local, 'started', None)
+        if started is None:
+            return
+        self._local.started = None
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or 'unknown'
+        queries = self._local.queries
+
+        with self._lock:
+            key = (endpoint, request.method, status)
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(elapsed)
+
+            histogram = self._request_queries.get(endpoint)
+            if histogram is None:
+                histogram = self._request_queries[endpoint] = Histogram(QUERY_COUNT_BUCKETS)
+            histogram.observe(queries)
+
+        if self.query_warn_threshold and queries > self.query_warn_threshold:
+            current_app.logger.warning(
+                '%s %s menjalankan %d query (%.1f ms di database), batas %d',
+                request.method, request.path, queries, self._local.query_time * 1000, self.query_warn_threshold
+            )
+
+    def render(self):
+        """Semua metrik dalam format teks Prometheus"""
+        lines = []
+        with self._lock:
+            lines.append('# HELP http_request_duration_seconds Latensi request per endpoint.')
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for (endpoint, method, status), histogram in sorted(self._requests.items()):
+                labels = (('endpoint', endpoint), ('method', method), ('status', status))
+                lines.extend(histogram.lines('http_request_duration_seconds', labels))
+
+            lines.append('# HELP http_request_queries Jumlah query SQL per request.')
+            lines.append('# TYPE http_request_queries histogram')
+            for endpoint, histogram in sorted(self._request_queries.items()):
+                lines.extend(histogram.lines('http_request_queries', (('endpoint', endpoint),)))
+
+            lines.append('# HELP db_query_duration_seconds Durasi eksekusi query SQL.')
+            lines.append('# TYPE db_query_duration_seconds histogram')
+            lines.extend(self._query_duration.lines('db_query_duration_seconds', ()))
+
+        for name, (kind, help_text, read) in self._collectors.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name} {read()}')
+        return '\n'.join(lines) + '\n'
+
+    def _metrics_view(self):
+        supplied = request.headers.get('Authorization', '')
+        if not self.token or not hmac.compare_digest(supplied, f'Bearer {self.token}'):
+            abort(401)
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+def _register_service_collectors(metrics):
+    from app.services.debounce import scan_debouncer
+    from app.services.directory import directory
+    from app.services.events import live_feed
+    from app.services.identity import user_cache
+    from app.services.writer import attendance_writer
+
+    metrics.gauge('barcode_cache_entries', 'Jumlah entri cache barcode.', lambda: directory.stats()['size'])
+    metrics.counter('barcode_cache_hits_total', 'Jumlah cache hit barcode.', lambda: directory.stats()['hits'])
+    metrics.counter('barcode_cache_misses_total', 'Jumlah cache miss barcode.', lambda: directory.stats()['misses'])
+    metrics.counter('user_cache_hits_total', 'Jumlah cache hit identitas user.', lambda: user_cache.stats()['hits'])
+    metrics.counter('user_cache_misses_total', 'Jumlah cache miss identitas user.', lambda: user_cache.stats()['misses'])
+    metrics.gauge('live_feed_subscribers', 'Jumlah koneksi feed live.', lambda: live_feed.stats()['subscribers'])
+    metrics.gauge('attendance_writer_pending', 'Scan write-behind yang belum tersimpan.',
+                  lambda: attendance_writer.health()['pending'])
+    metrics.counter('scan_debounce_suppressed_total', 'Scan ganda yang ditahan debounce di proses ini.',
+                  lambda: scan_debouncer.stats()['suppressed'])
+
+metrics = Metrics()
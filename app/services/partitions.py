@@ -0,0 +1,118 @@
+from datetime import date
+from app.models import db
+from app.models.attendance import Attendance
+from app.services.archive import month_starts, next_month
+
+TABLE = Attendance.__tablename__
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+def partition_name(month):
+    return f'{TABLE}_{month:%Y_%m}'
+
+def supported():
+    return db.engine.dialect.name == 'postgresql'
+
+def is_partitioned():
+    if not supported():
+        return False
+    return db.session.execute(db.text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+    ), {'table': TABLE}).first() is not None
+
+def existing_partitions():
+    """Nama partisi attendances yang sudah ada"""
+    return set(db.session.scalars(db.text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+    ), {'table': TABLE}))
+
+def ensure_partitions(first_month, months_ahead):
+    """Buat partisi bulanan dari first_month sampai months_ahead bulan setelah bulan ini.
+
+    Partisi masa depan dibuat lebih awal supaya scan baru tidak pernah jatuh
+    ke partisi default. Tidak melakukan commit; kembalikan nama partisi baru.
+    """
+    today = date.today()
+    last = date(today.year, today.month, 1)
+    for _ in range(months_ahead):
+        last = next_month(last)
+
+    existing = existing_partitions()
+    created = []
+    for month in month_starts(first_month, next_month(last)):
+        name = partition_name(month)
+        if name in existing:
+            continue
+        db.session.execute(db.text(
+            f'CREATE TABLE {name} PARTITION OF {TABLE} '
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+        ))
+        created.append(name)
+
+    if DEFAULT_PARTITION not in existing:
+        db.session.execute(db.text(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT'))
+        created.append(DEFAULT_PARTITION)
+    return created
+
+def convert_to_partitioned(months_ahead):
+    """Ubah tabel attendances biasa menjadi tabel berpartisi RANGE (timestamp) per bulan.
+
+    Dijalankan dalam satu transaksi: tabel lama di-rename, tabel induk
+    berpartisi dibuat dengan kolom dan default yang sama, data disalin, lalu
+    tabel lama dihapus. Primary key menjadi (id, timestamp) karena kunci
+    partisi wajib menjadi bagian dari primary key; sequence id tetap dipakai.
+    Indeks dari model dibuat di tabel induk setelah data masuk sehingga
+    otomatis terbentuk di setiap partisi. Tidak melakukan commit.
+    """
+    legacy = f'{TABLE}_unpartitioned'
+    db.session.execute(db.text(f'LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE'))
+    sequence = db.session.scalar(db.text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': TABLE})
+    first_timestamp = db.session.scalar(db.select(db.func.min(Attendance.timestamp)))
+    first_month = (first_timestamp.date() if first_timestamp else date.today()).replace(day=1)
+
+    db.session.execute(db.text(f'ALTER TABLE {TABLE} RENAME TO {legacy}'))
+    db.session.execute(db.text(
+        f'CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ("timestamp")'
+    ))
+    created = ensure_partitions(first_month, months_ahead)
+
+    columns = ', '.join(f'"{column.name}"' for column in Attendance.__table__.columns)
+    db.session.execute(db.text(f'INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {legacy}'))
+
+    if sequence:
+        db.session.execute(db.text(f'ALTER SEQUENCE {sequence} OWNED BY NONE'))
+    db.session.execute(db.text(f'DROP TABLE {legacy}'))
+    if sequence:
+        db.session.execute(db.text(f'ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id'))
+
+    db.session.execute(db.text(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, "timestamp")'))
+    db.session.execute(db.text(
+        f'ALTER TABLE {TABLE} ADD FOREIGN KEY (person_id) REFERENCES people (id) ON DELETE SET NULL'
+    ))
+    connection = db.session.connection()
+    for index in Attendance.__table__.indexes:
+        index.create(connection)
+    return created
+
+def drop_range(start, end):
+    """Hapus absensi pada rentang [start, end) (tanpa commit).
+
+    Pada tabel berpartisi, partisi bulanan yang seluruhnya berada di dalam
+    rentang di-drop, jauh lebih murah daripada DELETE baris per baris. Sisa
+    baris (misalnya di partisi default) dihapus dengan DELETE biasa.
+    """
+    if is_partitioned():
+        existing = existing_partitions()
+        for month in month_starts(start.date(), end.date()):
+            name = partition_name(month)
+            if name in existing and start.date() <= month and next_month(month) <= end.date():
+                db.session.execute(db.text(f'DROP TABLE {name}'))
+
+    db.session.execute(Attendance.__table__.delete().where(
+        Attendance.timestamp >= start,
+        Attendance.timestamp < end
+    ))
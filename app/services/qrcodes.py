@@ -0,0 +1,291 @@
+import atexit
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+import qrcode
+from app.services.cache import LRUCache
+from app.services.export import safe_filename
+
+# Parameter render QR; ubah QR_STYLE_VERSION jika parameter ini diganti supaya cache lama tidak dipakai
+QR_BOX_SIZE = 10
+QR_BORDER = 4
+QR_STYLE_VERSION = 1
+
+# Tata letak kartu pada 150 dpi: kartu ID 85.6 x 54 mm di kertas A4.
+# Kartu dan halaman dibuat grayscale supaya PDF satu kelas tetap hemat memori.
+CARD_DPI = 150
+CARD_SIZE = (506, 319)
+PAGE_SIZE = (1240, 1754)
+PAGE_MARGIN = 60
+CARD_GAP = 24
+
+def qr_key(data):
+    """Kunci cache berbasis isi: hash dari data barcode dan versi gaya QR"""
+    return hashlib.sha256(f'{QR_STYLE_VERSION}:{data}'.encode('utf-8')).hexdigest()
+
+def render_qr_png(data):
+    """Render satu QR code menjadi bytes PNG (dipanggil juga di proses worker)"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=QR_BOX_SIZE,
+        border=QR_BORDER,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    output = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(output)
+    return output.getvalue()
+
+class QRRenderer:
+    """Render QR code dengan cache berlapis yang dialamatkan oleh isinya.
+
+    Lapisan pertama adalah LRU in-memory berisi bytes PNG
+    (QR_MEMORY_CACHE_SIZE entri). Endpoint gambar (render) hanya memakai
+    lapisan ini sehingga tetap berjalan di container dengan filesystem
+    read-only.
+
+    Untuk cetak kartu massal (render_many) file PNG juga disimpan di
+    QR_CACHE_DIR dengan nama hash data barcode, sehingga cetak ulang hanya
+    merender barcode yang belum pernah dirender. Jika folder tersebut tidak
+    bisa dibaca atau ditulis, cache disk dilewati. Render
+    dalam jumlah besar dibagi ke process pool (QR_RENDER_WORKERS) karena
+    pembuatan QR dan PNG terikat CPU dan tidak paralel di dalam satu
+    interpreter. Pool memakai start method 'spawn' agar proses worker tidak
+    mewarisi koneksi database milik proses web.
+    """
+
+    def __init__(self):
+        self.cache_dir = None
+        self.workers = 0
+        self.pool_min_misses = 0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._memory = LRUCache()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.cache_dir = app.config.get('QR_CACHE_DIR') or os.path.join(app.instance_path, 'qrcodes')
+        workers = app.config.get('QR_RENDER_WORKERS')
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.pool_min_misses = app.config.get('QR_POOL_MIN_MISSES', 32)
+        self._memory.configure(maxsize=app.config.get('QR_MEMORY_CACHE_SIZE', 2000))
+        app.extensions['qr_renderer'] = self
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.png')
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, key, png):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Tulis ke file sementara lalu rename supaya pembaca tidak melihat file setengah jadi
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        except OSError:
+            # Filesystem read-only atau penuh: cache disk dilewati
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def render(self, data):
+        """Bytes PNG satu QR code dari LRU in-memory, tanpa menyentuh disk"""
+        key = qr_key(data)
+        png = self._memory.get(key)
+        if png is not None:
+            self.hits += 1
+            return png
+
+        self.misses += 1
+        png = render_qr_png(data)
+        self._memory.set(key, png)
+        return png
+
+    def render_many(self, values):
+        """Kembalikan {data: bytes PNG} untuk cetak massal; hanya cache miss yang dirender"""
+        result = {}
+        missing = {}
+        for data in values:
+            if data in result or data in missing:
+                continue
+            key = qr_key(data)
+            png = self._memory.get(key)
+            if png is None:
+                png = self._read(key)
+                if png is not None:
+                    self._memory.set(key, png)
+            if png is None:
+                missing[data] = key
+            else:
+                result[data] = png
+
+        self.hits += len(result)
+        self.misses += len(missing)
+        if not missing:
+            return result
+
+        pending = list(missing)
+        if self.workers > 1 and len(pending) >= self.pool_min_misses:
+            chunksize = max(1, len(pending) // (self.workers * 4))
+            rendered = self._get_executor().map(render_qr_png, pending, chunksize=chunksize)
+        else:
+            rendered = map(render_qr_png, pending)
+
+        for data, png in zip(pending, rendered):
+            self._write(missing[data], png)
+            self._memory.set(missing[data], png)
+            result[data] = png
+        return result
+
+    def stats(self):
+        return {
+            'memory_size': len(self._memory),
+            'memory_hits': self._memory.hits,
+            'memory_misses': self._memory.misses,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+qr_renderer = QRRenderer()
+atexit.register(qr_renderer.shutdown)
+
+def _load_font(size):
+    for name in ('DejaVuSans.ttf', 'Arial.ttf'):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+def _wrap(draw, text, font, width):
+    lines = []
+    line = ''
+    for word in text.split():
+        candidate = f'{line} {word}'.strip()
+        if line and draw.textlength(candidate, font=font) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+def render_card(card, png, fonts):
+    """Susun satu kartu ID: QR di kiri, nama dan identitas di kanan.
+
+    card berisi (nama, label tipe, nomor induk, kelas, barcode).
+    """
+    name, label, number, class_name, barcode = card
+    title_font, body_font = fonts
+    width, height = CARD_SIZE
+
+    image = Image.new('L', CARD_SIZE, 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, width - 1, height - 1], outline='black', width=2)
+
+    qr_size = height - 40
+    qr_image = Image.open(io.BytesIO(png)).convert('L').resize((qr_size, qr_size), Image.NEAREST)
+    image.paste(qr_image, (20, 20))
+
+    x = qr_size + 40
+    text_width = width - x - 20
+    y = 40
+    for line in _wrap(draw, name, title_font, text_width)[:3]:
+        draw.text((x, y), line, fill='black', font=title_font)
+        y += 28
+    y += 10
+    for line in (f'{label}', number, class_name, barcode):
+        if line:
+            draw.text((x, y), line, fill='black', font=body_font)
+            y += 24
+    return image
+
+def _iter_card_images(cards):
+    pngs = qr_renderer.render_many([card[4] for card in cards])
+    fonts = (_load_font(22), _load_font(18))
+    for card in cards:
+        yield card, render_card(card, pngs[card[4]], fonts)
+
+def build_cards_pdf(cards):
+    """PDF A4 berisi kartu ID siap cetak, 2 kolom x 5 baris per halaman"""
+    columns = (PAGE_SIZE[0] - 2 * PAGE_MARGIN + CARD_GAP) // (CARD_SIZE[0] + CARD_GAP)
+    rows = (PAGE_SIZE[1] - 2 * PAGE_MARGIN + CARD_GAP) // (CARD_SIZE[1] + CARD_GAP)
+    per_page = columns * rows
+
+    pages = []
+    for index, (_, image) in enumerate(_iter_card_images(cards)):
+        if index % per_page == 0:
+            pages.append(Image.new('L', PAGE_SIZE, 'white'))
+        slot = index % per_page
+        x = PAGE_MARGIN + (slot % columns) * (CARD_SIZE[0] + CARD_GAP)
+        y = PAGE_MARGIN + (slot // columns) * (CARD_SIZE[1] + CARD_GAP)
+        pages[-1].paste(image, (x, y))
+    if not pages:
+        pages.append(Image.new('L', PAGE_SIZE, 'white'))
+
+    output = io.BytesIO()
+    pages[0].save(output, 'PDF', resolution=CARD_DPI, save_all=True, append_images=pages[1:])
+    return output.getvalue()
+
+def build_cards_zip(cards):
+    """ZIP berisi satu PNG kartu ID per orang"""
+    output = io.BytesIO()
+    used = set()
+    # PNG sudah terkompresi, jadi isi ZIP cukup disimpan tanpa kompresi ulang
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+        for card, image in _iter_card_images(cards):
+            buffer = io.BytesIO()
+            image.save(buffer, 'PNG', dpi=(CARD_DPI, CARD_DPI))
+            # Pasangan nama_barcode bisa sama setelah dibersihkan: beri nomor supaya entri tidak ganda
+            stem = safe_filename(f'{card[0]}_{card[4]}')
+            filename, number = f'{stem}.png', 1
+            while filename in used:
+                number += 1
+                filename = f'{stem}_{number}.png'
+            used.add(filename)
+            archive.writestr(filename, buffer.getvalue())
+    return output.getvalue()
+
+CARD_FORMATS = {
+    'pdf': ('application/pdf', build_cards_pdf),
+    'zip': ('application/zip', build_cards_zip),
+}
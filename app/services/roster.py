@@ -0,0 +1,119 @@
+import gzip
+import json
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from app.models import db
+from app.models.person import Person
+from app.models.roster import RosterChange
+
+# Kode tipe satu huruf supaya payload roster tetap kecil
+TYPE_CODES = {
+    'teacher': 't',
+    'student': 's',
+}
+
+FIELDS = ['barcode', 'name', 'type']
+
+# Body JSON siap kirim beserta versi gzip-nya (None jika terlalu kecil untuk dikompres)
+RosterPayload = namedtuple('RosterPayload', ['etag', 'version', 'body', 'gzipped'])
+
+GZIP_MIN_SIZE = 1024
+
+def _encode(payload):
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_SIZE else None
+    return body, gzipped
+
+class RosterSync:
+    """Snapshot dan delta roster barcode untuk validasi scan di kiosk.
+
+    Versi roster adalah id terakhir di RosterChange. Kiosk mengambil
+    snapshot sekali, lalu hanya meminta perubahan sejak versinya. Baris dengan
+    id lebih kecil bisa saja baru di-commit setelah baris dengan id lebih besar,
+    jadi versi yang dikembalikan hanya maju sampai perubahan yang sudah lebih
+    tua dari ROSTER_SYNC_SETTLE detik; perubahan yang lebih baru tetap dikirim
+    dan akan terkirim ulang pada delta berikutnya (upsert/delete idempoten).
+
+    Snapshot di-cache per versi dalam bentuk JSON dan gzip sehingga banyak kiosk
+    yang sinkron bersamaan tidak membaca ulang tabel people.
+    """
+
+    def __init__(self):
+        self.settle_seconds = 10
+        self.max_delta = 5000
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def init_app(self, app):
+        self.settle_seconds = app.config.get('ROSTER_SYNC_SETTLE', 10)
+        self.max_delta = app.config.get('ROSTER_SYNC_MAX_DELTA', 5000)
+        self._snapshot = None
+        app.extensions['roster_sync'] = self
+
+    def versions(self):
+        """(id perubahan terakhir, versi yang sudah stabil)"""
+        latest = db.session.query(db.func.max(RosterChange.id)).scalar() or 0
+        cutoff = datetime.now() - timedelta(seconds=self.settle_seconds)
+        unsettled = db.session.query(db.func.min(RosterChange.id)).filter(
+            RosterChange.changed_at > cutoff
+        ).scalar()
+        return latest, latest if unsettled is None else unsettled - 1
+
+    def snapshot(self):
+        """RosterPayload berisi semua barcode yang valid"""
+        latest, settled = self.versions()
+        etag = f'roster-{latest}-{settled}'
+        with self._lock:
+            cached = self._snapshot
+        if cached is not None and cached.etag == etag:
+            return cached
+
+        people = db.session.query(Person.barcode, Person.name, Person.person_type).order_by(Person.barcode)
+        body, gzipped = _encode({
+            'version': settled,
+            'fields': FIELDS,
+            'people': [[barcode, name, TYPE_CODES[person_type]] for barcode, name, person_type in people],
+        })
+        payload = RosterPayload(etag, settled, body, gzipped)
+        with self._lock:
+            self._snapshot = payload
+        return payload
+
+    def delta(self, since):
+        """RosterPayload berisi perubahan setelah versi since.
+
+        Jika kiosk harus mengambil snapshot ulang (people dibangun ulang, versi
+        tidak dikenal, atau perubahan terlalu banyak) payload berisi reset: true.
+        """
+        latest, settled = self.versions()
+        etag = f'roster-{since}-{latest}-{settled}'
+        if since > latest:
+            return self._reset(etag, settled)
+
+        changes = db.session.query(
+            RosterChange.action, RosterChange.barcode, RosterChange.name, RosterChange.person_type
+        ).filter(RosterChange.id > since).order_by(RosterChange.id).limit(self.max_delta + 1).all()
+        if len(changes) > self.max_delta or any(action == 'reset' for action, _, _, _ in changes):
+            return self._reset(etag, settled)
+
+        # Hanya perubahan terakhir per barcode yang dikirim
+        latest_change = {}
+        for action, barcode, name, person_type in changes:
+            latest_change[barcode] = (action, name, person_type)
+
+        body, gzipped = _encode({
+            'version': max(since, settled),
+            'upsert': [
+                [barcode, name, TYPE_CODES[person_type]]
+                for barcode, (action, name, person_type) in latest_change.items() if action == 'upsert'
+            ],
+            'delete': [barcode for barcode, (action, _, _) in latest_change.items() if action == 'delete'],
+        })
+        return RosterPayload(etag, max(since, settled), body, gzipped)
+
+    def _reset(self, etag, version):
+        body, gzipped = _encode({'version': version, 'reset': True})
+        return RosterPayload(etag, version, body, gzipped)
+
+roster_sync = RosterSync()
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from datetime import date
+from app.models import db
+from app.models.attendance import Attendance
+from app.models.presence import DailyPresence
+from app.models.rollup import AttendanceRollup
+from app.services.counters import count_scans, dashboard_counters
+from app.services.directory import PERSON_TYPE_LABELS, directory
+from app.services.events import live_feed
+
+def decide_attendance(already_in, scan_time, setting):
+    """Tentukan tipe absensi ('in'/'out') dan statusnya untuk satu scan.
+
+    already_in bernilai True jika orang tersebut sudah absen masuk pada hari
+    yang sama. scan_time adalah jam (time) saat scan dilakukan.
+    """
+    if already_in:
+        # Sudah absen masuk, maka ini adalah absen pulang
+        if setting.attendance_end_time and scan_time > setting.attendance_end_time:
+            return 'out', 'late'  # Pulang terlambat
+        return 'out', 'on_time'
+
+    # Ini adalah absen masuk
+    if setting.late_time and scan_time > setting.late_time:
+        return 'in', 'late'  # Masuk terlambat
+    return 'in', 'on_time'
+
+def _presence_entry(barcode, scan_times, setting):
+    # Data upsert presensi harian untuk satu atau lebih scan barcode pada hari yang sama
+    first_scan = min(scan_times)
+    _, check_in_status = decide_attendance(False, first_scan.time(), setting)
+    return {
+        'barcode': barcode,
+        'day': first_scan.date(),
+        'scan_count': len(scan_times),
+        'check_in_time': first_scan,
+        'check_in_status': check_in_status,
+        'last_scan_at': max(scan_times)
+    }
+
+def apply_scans(scans, setting, client_scan_ids=None):
+    """Simpan sekumpulan scan ke presensi harian, tabel attendances dan rekap harian.
+
+    scans adalah list tuple (scanned_at, barcode, location, person_id). Scan diproses
+    berurutan berdasarkan waktu: scan pertama seseorang pada suatu hari adalah
+    absen masuk, berikutnya absen pulang. client_scan_ids (opsional) berisi ID
+    scan offline dari kiosk dengan urutan yang sama dengan scans. Mengembalikan
+    list (attendance_type, status) dengan urutan yang sama dengan input.
+    Tidak melakukan commit.
+    """
+    # Kelompokkan scan per barcode per hari lalu upsert presensi harian sekaligus
+    groups = defaultdict(list)
+    for scanned_at, barcode, _, _ in scans:
+        groups[(barcode, scanned_at.date())].append(scanned_at)
+    scan_counts = DailyPresence.register_scans([
+        _presence_entry(barcode, scan_times, setting)
+        for (barcode, _), scan_times in sorted(groups.items())
+    ])
+
+    # Jumlah scan yang sudah tercatat sebelum scan-scan ini
+    previous_counts = {key: scan_counts[key] - len(scan_times) for key, scan_times in groups.items()}
+
+    decisions = [None] * len(scans)
+    rows = []
+    rollups = {}
+    for index in sorted(range(len(scans)), key=lambda i: (scans[i][0], i)):
+        scanned_at, barcode, location, person_id = scans[index]
+        key = (barcode, scanned_at.date())
+        attendance_type, status = decide_attendance(previous_counts[key] > 0, scanned_at.time(), setting)
+        previous_counts[key] += 1
+
+        rows.append({
+            'barcode': barcode,
+            'person_id': person_id,
+            'attendance_type': attendance_type,
+            'timestamp': scanned_at,
+            'location': location,
+            'status': status,
+            'client_scan_id': client_scan_ids[index] if client_scan_ids else None
+        })
+        decisions[index] = (attendance_type, status)
+
+        rollup = rollups.setdefault(key, {
+            'barcode': barcode,
+            'person_id': person_id,
+            'day': key[1],
+            'on_time_count': 0,
+            'late_count': 0
+        })
+        rollup['on_time_count' if status == 'on_time' else 'late_count'] += 1
+
+    db.session.execute(Attendance.__table__.insert(), rows)
+    # Perbarui rekap harian per orang dalam transaksi yang sama
+    AttendanceRollup.add_counts([rollups[key] for key in sorted(rollups)])
+    return decisions
+
+def scans_committed(scans, decisions):
+    """Perbarui counter dashboard dan feed live setelah scan berhasil di-commit.
+
+    scans dan decisions sama seperti pada apply_scans. Nama orang diambil dari
+    cache direktori barcode, jadi umumnya tidak ada query tambahan.
+    """
+    dashboard_counters.record_scans(scans, decisions)
+    if not live_feed.has_subscribers:
+        return
+
+    people = directory.resolve_many(barcode for _, barcode, _, _ in scans)
+    for (scanned_at, barcode, location, _), (attendance_type, status) in zip(scans, decisions):
+        person = people.get(barcode)
+        live_feed.publish('scan', {
+            'person_name': person.name if person else 'Unknown',
+            'person_type': PERSON_TYPE_LABELS.get(person.type, 'Unknown') if person else 'Unknown',
+            'attendance_type': 'Masuk' if attendance_type == 'in' else 'Pulang',
+            'status': 'Tepat Waktu' if status == 'on_time' else 'Tidak Tepat Waktu',
+            'late': status == 'late',
+            'time': scanned_at.strftime('%H:%M:%S'),
+            'date': scanned_at.strftime('%Y-%m-%d'),
+            'location': location
+        })
+
+    live_feed.publish('totals', live_totals())
+
+def live_totals():
+    """Ringkasan scan hari ini untuk feed live.
+
+    Dihitung dari database, bukan dari counter dashboard per worker, supaya
+    total sama untuk semua koneksi walaupun scan diproses worker lain.
+    """
+    today = date.today()
+    scans_in, scans_out, scans_late = count_scans(today)
+    return {
+        'day': today.isoformat(),
+        'scans_in': scans_in,
+        'scans_out': scans_out,
+        'scans_late': scans_late,
+        'scans_on_time': scans_in - scans_late,
+    }
+
+def build_scan_result(person, attendance_type, status, scanned_at, location):
+    """Susun respons JSON standar untuk scan yang berhasil"""
+    person_type = PERSON_TYPE_LABELS[person.type]
+
+    if status == 'on_time':
+        message = f'{person_type} {person.name} - Anda Tepat Waktu'
+    else:
+        message = f'{person_type} {person.name} - Anda Tidak Tepat Waktu'
+
+    return {
+        'success': True,
+        'message': message,
+        'person_name': person.name,
+        'person_type': person_type,
+        'attendance_type': 'Masuk' if attendance_type == 'in' else 'Pulang',
+        'status': 'Tepat Waktu' if status == 'on_time' else 'Tidak Tepat Waktu',
+        'time': scanned_at.strftime('%H:%M:%S'),
+        'date': scanned_at.strftime('%Y-%m-%d'),
+        'location': location
+    }
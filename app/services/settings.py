@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import namedtuple
+from app.models import db
+from app.models.setting import Setting
+
+SettingsSnapshot = namedtuple('SettingsSnapshot', [
+    'attendance_start_time',
+    'attendance_end_time',
+    'late_time',
+    'must_present_for_leave',
+    'version',
+])
+
+def _column_default(name):
+    return Setting.__table__.c[name].default.arg
+
+def _snapshot_from(setting):
+    if setting is None:
+        # Belum ada baris pengaturan: gunakan nilai default kolom tanpa menulis ke database
+        return SettingsSnapshot(
+            attendance_start_time=_column_default('attendance_start_time'),
+            attendance_end_time=_column_default('attendance_end_time'),
+            late_time=_column_default('late_time'),
+            must_present_for_leave=_column_default('must_present_for_leave'),
+            version=0,
+        )
+
+    return SettingsSnapshot(
+        attendance_start_time=setting.attendance_start_time,
+        attendance_end_time=setting.attendance_end_time,
+        late_time=setting.late_time,
+        must_present_for_leave=setting.must_present_for_leave,
+        version=setting.version or 0,
+    )
+
+class SettingsStore:
+    """Snapshot pengaturan absensi yang immutable dan dibagi seluruh request.
+
+    Snapshot dimuat sekali lalu hanya diperbarui ketika versi pengaturan
+    berubah. Perubahan dari admin.settings pada proses yang sama langsung
+    terlihat melalui refresh(); worker lain mendeteksinya dengan mengecek
+    kolom version paling sering sekali per SETTINGS_VERSION_CHECK_INTERVAL.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.check_interval = 5
+
+    def init_app(self, app):
+        app.config.setdefault('SETTINGS_VERSION_CHECK_INTERVAL', 5)
+        self.check_interval = app.config['SETTINGS_VERSION_CHECK_INTERVAL']
+        self._snapshot = None
+        app.extensions['settings_store'] = self
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.refresh()
+
+        if self.check_interval is not None and time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            version = db.session.query(Setting.version).order_by(Setting.id).limit(1).scalar()
+            if (version or 0) != snapshot.version:
+                return self.refresh()
+
+        return snapshot
+
+    def refresh(self):
+        """Muat ulang snapshot dari database"""
+        with self._lock:
+            setting = Setting.query.order_by(Setting.id).first()
+            self._snapshot = _snapshot_from(setting)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+settings_store = SettingsStore()
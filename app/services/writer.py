@@ -0,0 +1,292 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+from app.models import db
+from app.models.presence import DailyPresence
+from app.services.scanning import apply_scans, scans_committed
+from app.services.settings import settings_store
+
+class AttendanceWriter:
+    """Antrean write-behind untuk insert absensi dengan group commit.
+
+    Jika ATTENDANCE_WRITE_BEHIND aktif, scan divalidasi dan langsung dijawab,
+    lalu dimasukkan ke antrean di memori. Thread penulis menyimpan antrean per
+    kelompok dalam satu transaksi, setiap ATTENDANCE_WRITE_BATCH_SIZE scan atau
+    setiap ATTENDANCE_WRITE_FLUSH_INTERVAL detik, mana yang lebih dulu.
+
+    Jawaban masuk/pulang ke kiosk adalah perkiraan dari hitungan lokal proses;
+    nilai yang disimpan tetap ditentukan ulang oleh upsert presensi harian
+    saat penulisan. Saat proses berhenti antrean di-flush, dan jika database
+    tidak bisa dihubungi sisa antrean ditulis ke ATTENDANCE_WRITE_SPOOL untuk
+    diputar ulang oleh worker pertama yang menerima scan setelah restart.
+
+    Hanya kegagalan yang bisa pulih sendiri (koneksi database putus) yang
+    dicoba ulang utuh. Kegagalan lain dipersempit dengan membagi dua batch
+    sampai tersisa baris yang memang ditolak; baris tersebut dipindah ke
+    ATTENDANCE_WRITE_DEAD_LETTER supaya tidak menahan scan berikutnya.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._retry = []
+        self._claimed_spool = None
+        self._presence = {}
+        self._presence_day = None
+        self.written = 0
+        self.failed_flushes = 0
+        self.dead_lettered = 0
+        self.last_flush_at = None
+        self.last_error = None
+
+    def init_app(self, app):
+        app.config.setdefault('ATTENDANCE_WRITE_BEHIND', False)
+        app.config.setdefault('ATTENDANCE_WRITE_BATCH_SIZE', 200)
+        app.config.setdefault('ATTENDANCE_WRITE_FLUSH_INTERVAL', 0.5)
+        app.config.setdefault('ATTENDANCE_WRITE_QUEUE_SIZE', 10000)
+        app.config.setdefault('ATTENDANCE_WRITE_SPOOL', os.path.join(app.instance_path, 'attendance_spool.jsonl'))
+        app.config.setdefault('ATTENDANCE_WRITE_DEAD_LETTER', os.path.join(app.instance_path, 'attendance_dead_letter.jsonl'))
+        app.extensions['attendance_writer'] = self
+
+        self.enabled = app.config['ATTENDANCE_WRITE_BEHIND']
+        if not self.enabled:
+            return
+
+        self._app = app
+        self.batch_size = app.config['ATTENDANCE_WRITE_BATCH_SIZE']
+        self.flush_interval = app.config['ATTENDANCE_WRITE_FLUSH_INTERVAL']
+        self.spool_path = app.config['ATTENDANCE_WRITE_SPOOL']
+        self.dead_letter_path = app.config['ATTENDANCE_WRITE_DEAD_LETTER']
+        self._queue = queue.Queue(maxsize=app.config['ATTENDANCE_WRITE_QUEUE_SIZE'])
+        atexit.register(self.shutdown)
+
+    def enqueue(self, barcode, person_id, location, scanned_at):
+        """Masukkan scan ke antrean.
+
+        Mengembalikan perkiraan jumlah scan barcode tersebut hari itu
+        (termasuk scan ini), atau None jika antrean penuh sehingga pemanggil
+        harus menyimpan scan secara langsung.
+        """
+        self._ensure_started()
+        key = (barcode, scanned_at.date())
+
+        with self._state_lock:
+            if self._presence_day != scanned_at.date():
+                self._presence = {}
+                self._presence_day = scanned_at.date()
+            count = self._presence.get(key)
+
+        if count is None:
+            count = db.session.query(DailyPresence.scan_count).filter_by(
+                barcode=barcode, day=scanned_at.date()
+            ).scalar() or 0
+
+        with self._state_lock:
+            count = self._presence.setdefault(key, count)
+            try:
+                self._queue.put_nowait((scanned_at, barcode, location, person_id))
+            except queue.Full:
+                return None
+            self._presence[key] = count + 1
+            return count + 1
+
+    def flush(self):
+        """Tulis seluruh isi antrean sekarang juga; kembalikan jumlah scan yang tersimpan"""
+        if not self.enabled:
+            return 0
+
+        scans = []
+        while True:
+            try:
+                scans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return self._write(scans)
+
+    def health(self):
+        return {
+            'enabled': self.enabled,
+            'running': bool(self._thread and self._thread.is_alive()),
+            'pending': (self._queue.qsize() if self._queue else 0) + len(self._retry),
+            'written': self.written,
+            'failed_flushes': self.failed_flushes,
+            'dead_lettered': self.dead_lettered,
+            'last_flush_at': self.last_flush_at.isoformat() if self.last_flush_at else None,
+            'last_error': self.last_error,
+        }
+
+    def shutdown(self):
+        """Hentikan thread penulis dan pastikan tidak ada scan yang hilang"""
+        if not self.enabled:
+            return
+
+        self._stop.set()
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval * 4 + 5)
+
+        self.flush()
+        if self._retry:
+            self._write_spool(self._retry)
+            self._retry = []
+            if self._claimed_spool:
+                os.remove(self._claimed_spool)
+                self._claimed_spool = None
+
+    def _ensure_started(self):
+        # Thread tidak ikut ter-fork (mis. gunicorn --preload), jadi dijalankan per proses
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                # Spool diputar ulang di worker, bukan di master gunicorn --preload
+                # yang isinya akan ikut ter-fork ke setiap worker
+                self._pid = os.getpid()
+                with self._write_lock:
+                    self._restore_spool()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='attendance-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            scans = self._collect()
+            if scans or self._retry:
+                self._write(scans)
+                if self._retry:
+                    time.sleep(min(self.flush_interval * 10, 5))
+
+    def _collect(self):
+        # Kumpulkan scan sampai batch penuh atau jendela waktu habis
+        try:
+            scans = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(scans) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                scans.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return scans
+
+    def _write(self, scans):
+        with self._write_lock:
+            scans = self._retry + scans
+            self._retry = []
+            if not scans:
+                return 0
+
+            dead_lettered = self.dead_lettered
+            with self._app.app_context():
+                written, self._retry = self._commit(scans)
+
+            if self._retry:
+                self.failed_flushes += 1
+                return written
+
+            if self._claimed_spool:
+                # Isi spool lama sudah tersimpan (atau dipindah ke dead letter)
+                os.remove(self._claimed_spool)
+                self._claimed_spool = None
+
+            self.last_flush_at = datetime.now()
+            if self.dead_lettered == dead_lettered:
+                self.last_error = None
+            return written
+
+    def _commit(self, scans):
+        """Simpan scans dalam satu transaksi; kembalikan (jumlah tersimpan, scan yang harus dicoba ulang)"""
+        try:
+            decisions = apply_scans(scans, settings_store.get())
+            db.session.commit()
+        except OperationalError as e:
+            # Koneksi putus atau database sedang tidak tersedia: coba ulang nanti
+            db.session.rollback()
+            self.last_error = str(e)
+            self._app.logger.exception('Gagal menyimpan %d scan dari antrean write-behind', len(scans))
+            return 0, scans
+        except Exception as e:
+            db.session.rollback()
+            if len(scans) == 1:
+                self._dead_letter(scans[0], e)
+                return 0, []
+            # Bagi dua batch untuk menemukan baris yang ditolak; urutan scan tetap dijaga
+            middle = len(scans) // 2
+            written, retry = self._commit(scans[:middle])
+            if retry:
+                return written, retry + scans[middle:]
+            more, retry = self._commit(scans[middle:])
+            return written + more, retry
+
+        scans_committed(scans, decisions)
+        self.written += len(scans)
+        return len(scans), []
+
+    def _dead_letter(self, scan, error):
+        scanned_at, barcode, location, person_id = scan
+        self.dead_lettered += 1
+        self.last_error = str(error)
+        self._app.logger.error('Scan %s pada %s ditolak database dan dipindah ke %s: %s',
+                               barcode, scanned_at.isoformat(), self.dead_letter_path, error)
+        os.makedirs(os.path.dirname(self.dead_letter_path), exist_ok=True)
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as dead_letter:
+            dead_letter.write(json.dumps({
+                'scanned_at': scanned_at.isoformat(),
+                'barcode': barcode,
+                'location': location,
+                'person_id': person_id,
+                'error': str(error)
+            }) + '\n')
+
+    def _write_spool(self, scans):
+        os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+        with open(self.spool_path, 'a', encoding='utf-8') as spool:
+            for scanned_at, barcode, location, person_id in scans:
+                spool.write(json.dumps({
+                    'scanned_at': scanned_at.isoformat(),
+                    'barcode': barcode,
+                    'location': location,
+                    'person_id': person_id
+                }) + '\n')
+        self._app.logger.warning('%d scan disimpan ke spool %s', len(scans), self.spool_path)
+
+    def _restore_spool(self):
+        # Rename atomik supaya hanya satu worker yang memutar ulang spool
+        claimed = f'{self.spool_path}.{os.getpid()}'
+        try:
+            os.rename(self.spool_path, claimed)
+        except FileNotFoundError:
+            return
+
+        with open(claimed, encoding='utf-8') as spool:
+            for line in spool:
+                item = json.loads(line)
+                self._retry.append((
+                    datetime.fromisoformat(item['scanned_at']),
+                    item['barcode'],
+                    item['location'],
+                    item.get('person_id')
+                ))
+        # File baru dihapus setelah isinya berhasil tersimpan ke database
+        self._claimed_spool = claimed
+
+attendance_writer = AttendanceWriter()
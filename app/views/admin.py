@@ -1,17 +1,23 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, make_response, abort, current_app
 from flask_login import login_required, current_user
-from app.models import db
+from app.models import db, read_replica
 from app.models.user import User
 from app.models.teacher import Teacher
 from app.models.student import Student
 from app.models.setting import Setting
+from app.models.person import Person
 from app.forms.auth import UserForm
 from app.forms.teacher import TeacherForm
 from app.forms.student import StudentForm
 from app.forms.setting import SettingForm
-import qrcode
-from PIL import Image
-import os
+from app.forms.importer import ImportForm
+from app.services.counters import dashboard_counters
+from app.services.directory import directory
+from app.services.export import content_disposition
+from app.services.identity import user_cache
+from app.services.importer import IMPORT_SPECS, import_people
+from app.services.qrcodes import qr_renderer, qr_key, CARD_FORMATS
+from app.services.settings import settings_store
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -22,20 +28,21 @@ def check_admin_permission():
 @admin_bp.route('/')
 @login_required
 def dashboard():
-    # Hitung jumlah data
-    total_users = User.query.count()
-    total_teachers = Teacher.query.count()
-    total_students = Student.query.count()
-    total_settings = Setting.query.count()
+    # Counter diambil dari cache di memori, bukan COUNT(*) setiap kali halaman dibuka
+    counters = dashboard_counters.get()
     
     return render_template('admin/dashboard.html', 
-                         total_users=total_users,
-                         total_teachers=total_teachers,
-                         total_students=total_students,
-                         total_settings=total_settings)
+                         total_users=counters['users'],
+                         total_teachers=counters['teachers'],
+                         total_students=counters['students'],
+                         total_settings=counters['settings'],
+                         scans_in=counters['scans_in'],
+                         scans_out=counters['scans_out'],
+                         scans_late=counters['scans_late'])
 
 @admin_bp.route('/users')
 @login_required
+@read_replica
 def users():
     if not check_admin_permission():
         flash('Anda tidak memiliki akses ke halaman ini!', 'error')
@@ -61,6 +68,7 @@ def create_user():
         user.set_password(form.password.data)
         db.session.add(user)
         db.session.commit()
+        dashboard_counters.adjust('users', 1)
         flash('User berhasil dibuat!', 'success')
         return redirect(url_for('admin.users'))
     
@@ -86,6 +94,7 @@ def edit_user(id):
             user.set_password(form.password.data)
             
         db.session.commit()
+        user_cache.invalidate(user.id)
         flash('User berhasil diupdate!', 'success')
         return redirect(url_for('admin.users'))
     
@@ -105,14 +114,95 @@ def delete_user(id):
     
     db.session.delete(user)
     db.session.commit()
+    user_cache.invalidate(id)
+    dashboard_counters.adjust('users', -1)
     flash('User berhasil dihapus!', 'success')
     return redirect(url_for('admin.users'))
 
+@admin_bp.route('/users/toggle-active/<int:id>')
+@login_required
+def toggle_user_active(id):
+    if not check_admin_permission():
+        flash('Anda tidak memiliki akses ke halaman ini!', 'error')
+        return redirect(url_for('admin.dashboard'))
+    
+    user = User.query.get_or_404(id)
+    if user.role == 'super_admin':
+        flash('Tidak dapat menonaktifkan Super Admin!', 'error')
+        return redirect(url_for('admin.users'))
+    if user.id == current_user.id:
+        flash('Tidak dapat menonaktifkan akun sendiri!', 'error')
+        return redirect(url_for('admin.users'))
+    
+    user.is_active = not user.is_active
+    db.session.commit()
+    # Sesi user yang dinonaktifkan langsung berakhir di worker ini, worker lain setelah TTL cache
+    user_cache.invalidate(user.id)
+    flash('User berhasil diaktifkan!' if user.is_active else 'User berhasil dinonaktifkan!', 'success')
+    return redirect(url_for('admin.users'))
+
+def _import_view(person_type, title, back_endpoint):
+    form = ImportForm()
+    result = None
+    if form.validate_on_submit():
+        result = import_people(person_type, form.file.data.stream)
+        if result.errors:
+            flash(f'{result.inserted} dari {result.total} baris berhasil diimpor, {len(result.errors)} baris gagal.', 'warning')
+        else:
+            flash(f'{result.inserted} baris berhasil diimpor!', 'success')
+            return redirect(url_for(back_endpoint))
+
+    columns = IMPORT_SPECS[person_type]['columns']
+    return render_template('admin/import_form.html', form=form, title=title, result=result,
+                           columns=columns, back_endpoint=back_endpoint)
+
+def _prefix_pattern(value):
+    # Escape wildcard LIKE supaya input pengguna dicocokkan apa adanya
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def _search_filter(model, key_column, q):
+    """Pencarian awalan nama (tanpa beda huruf besar/kecil) atau NIS/NIP"""
+    return db.or_(
+        db.func.lower(model.name).like(_prefix_pattern(q.lower()), escape='\\'),
+        key_column.like(_prefix_pattern(q), escape='\\')
+    )
+
+def _roster_page(query, model, endpoint, params):
+    """Satu halaman daftar guru/siswa dengan keyset pagination berdasarkan (name, id)"""
+    page_size = current_app.config['ADMIN_PAGE_SIZE']
+    after_name = request.args.get('after_name')
+    after_id = request.args.get('after_id', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    params = {key: value for key, value in params.items() if value}
+    
+    if after_name is not None and after_id is not None:
+        query = query.filter(db.tuple_(model.name, model.id) > (after_name, after_id))
+    
+    rows = query.order_by(model.name, model.id).limit(page_size + 1).all()
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    
+    next_url = None
+    if has_next:
+        next_url = url_for(endpoint, after_name=rows[-1].name, after_id=rows[-1].id,
+                           offset=offset + len(rows), **params)
+    first_url = None
+    if after_id is not None:
+        first_url = url_for(endpoint, **params)
+    return rows, offset, next_url, first_url
+
 @admin_bp.route('/teachers')
 @login_required
+@read_replica
 def teachers():
-    teachers = Teacher.query.all()
-    return render_template('admin/teachers.html', teachers=teachers)
+    q = request.args.get('q', '').strip()
+    query = Teacher.query
+    if q:
+        query = query.filter(_search_filter(Teacher, Teacher.nip, q))
+    
+    teachers, offset, next_url, first_url = _roster_page(query, Teacher, 'admin.teachers', {'q': q})
+    return render_template('admin/teachers.html', teachers=teachers, q=q, offset=offset,
+                           next_url=next_url, first_url=first_url)
 
 @admin_bp.route('/teachers/create', methods=['GET', 'POST'])
 @login_required
@@ -132,12 +222,20 @@ def create_teacher():
             barcode=barcode
         )
         db.session.add(teacher)
+        Person.sync(teacher)
         db.session.commit()
+        directory.invalidate(teacher.barcode)
+        dashboard_counters.adjust('teachers', 1)
         flash('Guru berhasil ditambahkan!', 'success')
         return redirect(url_for('admin.teachers'))
     
     return render_template('admin/teacher_form.html', form=form, title='Tambah Guru')
 
+@admin_bp.route('/teachers/import', methods=['GET', 'POST'])
+@login_required
+def import_teachers():
+    return _import_view('teacher', 'Impor Guru', 'admin.teachers')
+
 @admin_bp.route('/teachers/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
 def edit_teacher(id):
@@ -150,7 +248,9 @@ def edit_teacher(id):
         teacher.phone = form.phone.data
         teacher.email = form.email.data
         teacher.address = form.address.data
+        Person.sync(teacher)
         db.session.commit()
+        directory.invalidate(teacher.barcode)
         flash('Data guru berhasil diupdate!', 'success')
         return redirect(url_for('admin.teachers'))
     
@@ -160,16 +260,35 @@ def edit_teacher(id):
 @login_required
 def delete_teacher(id):
     teacher = Teacher.query.get_or_404(id)
+    barcode = teacher.barcode
+    Person.remove(teacher)
     db.session.delete(teacher)
     db.session.commit()
+    directory.invalidate(barcode)
+    dashboard_counters.adjust('teachers', -1)
     flash('Guru berhasil dihapus!', 'success')
     return redirect(url_for('admin.teachers'))
 
 @admin_bp.route('/students')
 @login_required
+@read_replica
 def students():
-    students = Student.query.all()
-    return render_template('admin/students.html', students=students)
+    q = request.args.get('q', '').strip()
+    class_name = request.args.get('class_name', '').strip()
+    query = Student.query
+    if class_name:
+        query = query.filter(Student.class_name == class_name)
+    if q:
+        query = query.filter(_search_filter(Student, Student.nis, q))
+    
+    students, offset, next_url, first_url = _roster_page(
+        query, Student, 'admin.students', {'q': q, 'class_name': class_name}
+    )
+    class_names = db.session.scalars(
+        db.select(Student.class_name).where(Student.class_name.isnot(None)).distinct().order_by(Student.class_name)
+    ).all()
+    return render_template('admin/students.html', students=students, q=q, class_name=class_name,
+                           class_names=class_names, offset=offset, next_url=next_url, first_url=first_url)
 
 @admin_bp.route('/students/create', methods=['GET', 'POST'])
 @login_required
@@ -190,12 +309,20 @@ def create_student():
             barcode=barcode
         )
         db.session.add(student)
+        Person.sync(student)
         db.session.commit()
+        directory.invalidate(student.barcode)
+        dashboard_counters.adjust('students', 1)
         flash('Siswa berhasil ditambahkan!', 'success')
         return redirect(url_for('admin.students'))
     
     return render_template('admin/student_form.html', form=form, title='Tambah Siswa')
 
+@admin_bp.route('/students/import', methods=['GET', 'POST'])
+@login_required
+def import_students():
+    return _import_view('student', 'Impor Siswa', 'admin.students')
+
 @admin_bp.route('/students/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
 def edit_student(id):
@@ -209,7 +336,9 @@ def edit_student(id):
         student.phone = form.phone.data
         student.email = form.email.data
         student.address = form.address.data
+        Person.sync(student)
         db.session.commit()
+        directory.invalidate(student.barcode)
         flash('Data siswa berhasil diupdate!', 'success')
         return redirect(url_for('admin.students'))
     
@@ -219,8 +348,12 @@ def edit_student(id):
 @login_required
 def delete_student(id):
     student = Student.query.get_or_404(id)
+    barcode = student.barcode
+    Person.remove(student)
     db.session.delete(student)
     db.session.commit()
+    directory.invalidate(barcode)
+    dashboard_counters.adjust('students', -1)
     flash('Siswa berhasil dihapus!', 'success')
     return redirect(url_for('admin.students'))
 
@@ -236,6 +369,7 @@ def settings():
         setting = Setting()
         db.session.add(setting)
         db.session.commit()
+        dashboard_counters.adjust('settings', 1)
     
     form = SettingForm(obj=setting)
     if form.validate_on_submit():
@@ -243,7 +377,9 @@ def settings():
         setting.attendance_end_time = form.attendance_end_time.data
         setting.late_time = form.late_time.data
         setting.must_present_for_leave = form.must_present_for_leave.data
+        setting.version = Setting.version + 1
         db.session.commit()
+        settings_store.refresh()
         flash('Pengaturan berhasil disimpan!', 'success')
         return redirect(url_for('admin.settings'))
     
@@ -254,39 +390,62 @@ def settings():
 def generate_barcode(barcode_type, id):
     if barcode_type == 'teacher':
         person = Teacher.query.get_or_404(id)
-        barcode_data = person.barcode
-        name = person.name
     elif barcode_type == 'student':
         person = Student.query.get_or_404(id)
-        barcode_data = person.barcode
-        name = person.name
     else:
         flash('Tipe barcode tidak valid!', 'error')
         return redirect(url_for('admin.dashboard'))
     
-    # Generate QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(barcode_data)
-    qr.make(fit=True)
+    # Gambar QR dilayani langsung dari cache, tidak lagi ditulis ke folder static
+    return redirect(url_for('admin.barcode_image', barcode=person.barcode))
 
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Save image
-    filename = f"{barcode_type}_{id}.png"
-    filepath = os.path.join('app/static/images/barcodes', filename)
-    
-    # Create directory if not exists
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    
-    img.save(filepath)
-    
-    flash(f'Barcode untuk {name} berhasil dibuat!', 'success')
-    if barcode_type == 'teacher':
-        return redirect(url_for('admin.teachers'))
+@admin_bp.route('/barcodes/<string:barcode>.png')
+@login_required
+def barcode_image(barcode):
+    if directory.resolve(barcode) is None:
+        abort(404)
+
+    # Isi gambar hanya bergantung pada data barcode, jadi ETag kuat cukup dihitung dari hash-nya
+    etag = qr_key(barcode)
+    if etag in request.if_none_match:
+        response = make_response('', 304)
     else:
-        return redirect(url_for('admin.students'))
\ No newline at end of file
+        response = make_response(qr_renderer.render(barcode))
+        response.headers['Content-Type'] = 'image/png'
+    response.set_etag(etag)
+    # Gambar QR adalah kredensial absensi dan hanya untuk pengguna yang login,
+    # jadi hanya boleh disimpan cache browser, bukan proxy bersama
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config['QR_HTTP_MAX_AGE']
+    response.vary.add('Cookie')
+    return response
+
+def _cards_response(fmt, filename, cards):
+    mimetype, build = CARD_FORMATS[fmt]
+    response = make_response(build(cards))
+    response.headers['Content-Type'] = mimetype
+    response.headers['Content-Disposition'] = content_disposition(f'{filename}.{fmt}')
+    return response
+
+@admin_bp.route('/teachers/cards.<any(pdf, zip):fmt>')
+@login_required
+@read_replica
+def print_teacher_cards(fmt):
+    teachers = db.session.query(Teacher.name, Teacher.nip, Teacher.barcode).order_by(Teacher.name).all()
+    cards = [(name, 'Guru', f'NIP {nip}', None, barcode) for name, nip, barcode in teachers]
+    return _cards_response(fmt, 'kartu_guru', cards)
+
+@admin_bp.route('/students/cards.<any(pdf, zip):fmt>')
+@login_required
+@read_replica
+def print_student_cards(fmt):
+    class_name = request.args.get('class_name')
+    if not class_name:
+        flash('Pilih kelas yang akan dicetak!', 'error')
+        return redirect(url_for('admin.students'))
+
+    students = db.session.query(Student.name, Student.nis, Student.barcode).filter(
+        Student.class_name == class_name
+    ).order_by(Student.name).all()
+    cards = [(name, 'Siswa', f'NIS {nis}', f'Kelas {class_name}', barcode) for name, nis, barcode in students]
+    return _cards_response(fmt, f'kartu_siswa_{class_name}'.replace(' ', '_'), cards)
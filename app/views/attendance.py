@@ -1,120 +1,72 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+import hmac
+from sqlalchemy.exc import IntegrityError
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, Response, abort
 from flask_login import login_required, current_user
 from app.models import db
 from app.models.attendance import Attendance
-from app.models.teacher import Teacher
-from app.models.student import Student
-from app.models.setting import Setting
-from datetime import datetime, date, time
+from app.services.debounce import scan_debouncer
+from app.services.directory import directory, PERSON_TYPE_LABELS
+from app.services.roster import TYPE_CODES, roster_sync
+from app.services.settings import settings_store
+from app.services.scanning import decide_attendance, apply_scans, build_scan_result, scans_committed
+from app.services.writer import attendance_writer
+from datetime import datetime
 
 attendance_bp = Blueprint('attendance', __name__)
 
+LOCATION_MAX_LENGTH = Attendance.location.type.length
+
+def _record_scan(barcode, location):
+    # Scan ulang barcode yang sama dalam jendela debounce mendapat hasil scan pertama
+    return scan_debouncer.guard(barcode, lambda: _process_scan(barcode, location))
+
+def _process_scan(barcode, location):
+    # Cek apakah barcode milik guru atau siswa (melalui cache direktori barcode)
+    person = directory.resolve(barcode)
+
+    if not person:
+        return {'success': False, 'message': 'Barcode tidak ditemukan!'}
+
+    setting = settings_store.get()
+    current_datetime = datetime.now()
+
+    # Mode write-behind: tentukan masuk/pulang dari hitungan lokal lalu antrekan penyimpanannya
+    if attendance_writer.enabled:
+        scan_count = attendance_writer.enqueue(barcode, person.person_id, location, current_datetime)
+        if scan_count is not None:
+            attendance_type, status = decide_attendance(scan_count > 1, current_datetime.time(), setting)
+            return build_scan_result(person, attendance_type, status, current_datetime, location)
+
+    # Tentukan tipe absensi (masuk atau pulang) dari upsert presensi harian
+    # lalu buat record absensi dalam transaksi yang sama
+    scans = [(current_datetime, barcode, location, person.person_id)]
+    decisions = apply_scans(scans, setting)
+    db.session.commit()
+    scans_committed(scans, decisions)
+    attendance_type, status = decisions[0]
+
+    return build_scan_result(person, attendance_type, status, current_datetime, location)
+
 @attendance_bp.route('/')
+@attendance_bp.route('/kiosk')
 def index():
     # Halaman utama untuk scan barcode
-    return render_template('attendance/index.html')
+    type_labels = {code: PERSON_TYPE_LABELS[person_type] for person_type, code in TYPE_CODES.items()}
+    return render_template(
+        'attendance/index.html',
+        type_labels=type_labels,
+        roster_sync_interval=current_app.config['ROSTER_SYNC_INTERVAL']
+    )
 
 @attendance_bp.route('/scan', methods=['POST'])
 def scan_attendance():
     barcode = request.form.get('barcode')
     location = request.form.get('location', 'Unknown')
-    
+
     if not barcode:
         return jsonify({'success': False, 'message': 'Barcode tidak valid!'})
-    
-    # Cek apakah barcode milik guru atau siswa
-    teacher = Teacher.query.filter_by(barcode=barcode).first()
-    student = Student.query.filter_by(barcode=barcode).first()
-    
-    if not teacher and not student:
-        return jsonify({'success': False, 'message': 'Barcode tidak ditemukan!'})
-    
-    # Dapatkan nama orang yang absen
-    person_name = teacher.name if teacher else student.name
-    person_type = 'Guru' if teacher else 'Siswa'
-    
-    # Dapatkan pengaturan absensi
-    setting = Setting.query.first()
-    if not setting:
-        setting = Setting()
-        db.session.add(setting)
-        db.session.commit()
-    
-    current_time = datetime.now().time()
-    current_datetime = datetime.now()
-    
-    # Cek apakah waktu absensi masuk atau pulang
-    is_late = current_time > setting.late_time if setting.late_time else False
-    is_on_time = current_time <= setting.attendance_end_time if setting.attendance_end_time else True
-    
-    # Tentukan tipe absensi (masuk atau pulang)
-    # Cek apakah sudah absen masuk hari ini
-    today_start = datetime.combine(date.today(), time.min)
-    today_end = datetime.combine(date.today(), time.max)
-    
-    existing_attendance = Attendance.query.filter(
-        Attendance.barcode == barcode,
-        Attendance.timestamp.between(today_start, today_end),
-        Attendance.attendance_type == 'in'
-    ).first()
-    
-    attendance_type = 'in'
-    status = 'on_time'
-    
-    # Jika sudah absen masuk, maka ini adalah absen pulang
-    if existing_attendance:
-        attendance_type = 'out'
-        if current_time > setting.attendance_end_time:
-            status = 'late'  # Pulang terlambat
-        else:
-            status = 'on_time'
-    else:
-        # Ini adalah absen masuk
-        if is_late:
-            status = 'late'  # Masuk terlambat
-        else:
-            status = 'on_time'
-        
-        # Jika setting must_present_for_leave aktif, cek apakah ini absen masuk
-        if setting.must_present_for_leave and attendance_type == 'out':
-            return jsonify({
-                'success': False, 
-                'message': 'Anda harus absen masuk terlebih dahulu sebelum bisa absen pulang!'
-            })
-    
-    # Buat record absensi
-    attendance = Attendance(
-        barcode=barcode,
-        attendance_type=attendance_type,
-        timestamp=current_datetime,
-        location=location,
-        status=status
-    )
-    
-    db.session.add(attendance)
-    db.session.commit()
-    
-    # Tentukan pesan berdasarkan status
-    if status == 'on_time':
-        message = f'{person_type} {person_name} - Anda Tepat Waktu'
-    else:
-        message = f'{person_type} {person_name} - Anda Tidak Tepat Waktu'
-    
-    # Tambahkan info tambahan
-    time_info = current_datetime.strftime('%H:%M:%S')
-    date_info = current_datetime.strftime('%Y-%m-%d')
-    
-    return jsonify({
-        'success': True,
-        'message': message,
-        'person_name': person_name,
-        'person_type': person_type,
-        'attendance_type': 'Masuk' if attendance_type == 'in' else 'Pulang',
-        'status': 'Tepat Waktu' if status == 'on_time' else 'Tidak Tepat Waktu',
-        'time': time_info,
-        'date': date_info,
-        'location': location
-    })
+
+    return jsonify(_record_scan(barcode, location))
 
 @attendance_bp.route('/manual-scan')
 @login_required
@@ -126,96 +78,187 @@ def api_scan():
     data = request.get_json()
     barcode = data.get('barcode')
     location = data.get('location', 'Unknown')
-    
+
     if not barcode:
         return jsonify({'success': False, 'message': 'Barcode tidak valid!'})
-    
-    # Cek apakah barcode milik guru atau siswa
-    teacher = Teacher.query.filter_by(barcode=barcode).first()
-    student = Student.query.filter_by(barcode=barcode).first()
-    
-    if not teacher and not student:
-        return jsonify({'success': False, 'message': 'Barcode tidak ditemukan!'})
-    
-    # Dapatkan nama orang yang absen
-    person_name = teacher.name if teacher else student.name
-    person_type = 'Guru' if teacher else 'Siswa'
-    
-    # Dapatkan pengaturan absensi
-    setting = Setting.query.first()
-    if not setting:
-        setting = Setting()
-        db.session.add(setting)
-        db.session.commit()
-    
-    current_time = datetime.now().time()
-    current_datetime = datetime.now()
-    
-    # Cek apakah waktu absensi masuk atau pulang
-    is_late = current_time > setting.late_time if setting.late_time else False
-    is_on_time = current_time <= setting.attendance_end_time if setting.attendance_end_time else True
-    
-    # Tentukan tipe absensi (masuk atau pulang)
-    # Cek apakah sudah absen masuk hari ini
-    today_start = datetime.combine(date.today(), time.min)
-    today_end = datetime.combine(date.today(), time.max)
-    
-    existing_attendance = Attendance.query.filter(
-        Attendance.barcode == barcode,
-        Attendance.timestamp.between(today_start, today_end),
-        Attendance.attendance_type == 'in'
-    ).first()
-    
-    attendance_type = 'in'
-    status = 'on_time'
-    
-    # Jika sudah absen masuk, maka ini adalah absen pulang
-    if existing_attendance:
-        attendance_type = 'out'
-        if current_time > setting.attendance_end_time:
-            status = 'late'  # Pulang terlambat
-        else:
-            status = 'on_time'
-    else:
-        # Ini adalah absen masuk
-        if is_late:
-            status = 'late'  # Masuk terlambat
+
+    return jsonify(_record_scan(barcode, location))
+
+@attendance_bp.route('/api/scan/batch', methods=['POST'])
+def api_scan_batch():
+    """Terima banyak scan sekaligus dari kiosk yang sempat offline.
+
+    Body berupa list (atau {"scans": [...]}) berisi {barcode, location, scanned_at, scan_id}.
+    Semua scan diproses berurutan berdasarkan waktu dan disimpan dalam satu commit.
+    scan_id dibuat kiosk untuk setiap scan offline; scan yang dikirim ulang
+    dengan scan_id yang sudah tersimpan mendapat hasil semula (duplicate: true)
+    tanpa baris absensi baru.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('scans')
+
+    if not isinstance(data, list):
+        return jsonify({'success': False, 'message': 'Format data tidak valid!'}), 400
+
+    max_items = current_app.config['SCAN_BATCH_MAX_ITEMS']
+    if len(data) > max_items:
+        return jsonify({'success': False, 'message': f'Maksimal {max_items} scan per batch!'}), 413
+
+    results = [None] * len(data)
+    scans = []
+    now = datetime.now()
+
+    # Validasi setiap item
+    for index, item in enumerate(data):
+        barcode = item.get('barcode') if isinstance(item, dict) else None
+        if not barcode or not isinstance(barcode, str):
+            results[index] = {'index': index, 'success': False, 'message': 'Barcode tidak valid!'}
+            continue
+
+        location = item.get('location', 'Unknown')
+        if not isinstance(location, str) or len(location) > LOCATION_MAX_LENGTH:
+            results[index] = {'index': index, 'success': False, 'message': 'Lokasi tidak valid!'}
+            continue
+
+        client_scan_id = item.get('scan_id')
+        if client_scan_id is not None and not (isinstance(client_scan_id, str) and 0 < len(client_scan_id) <= 64):
+            results[index] = {'index': index, 'success': False, 'message': 'ID scan tidak valid!'}
+            continue
+
+        scanned_at = now
+        if item.get('scanned_at'):
+            try:
+                scanned_at = datetime.fromisoformat(item['scanned_at'])
+            except (TypeError, ValueError):
+                results[index] = {'index': index, 'success': False, 'message': 'Waktu scan tidak valid!'}
+                continue
+            # Simpan waktu lokal tanpa zona waktu, sama seperti scan biasa
+            if scanned_at.tzinfo is not None:
+                scanned_at = scanned_at.astimezone().replace(tzinfo=None)
+
+        scans.append((scanned_at, index, barcode, location, client_scan_id))
+
+    # Resolusi semua barcode dengan satu query
+    people = directory.resolve_many(scan[2] for scan in scans)
+    for _, index, barcode, _, _ in scans:
+        if barcode not in people:
+            results[index] = {'index': index, 'success': False, 'message': 'Barcode tidak ditemukan!'}
+    scans = [scan for scan in scans if scan[2] in people]
+
+    # Scan offline yang sudah tersimpan dari kiriman sebelumnya, atau muncul dua kali dalam batch ini
+    client_scan_ids = {scan[4] for scan in scans if scan[4]}
+    stored = {}
+    if client_scan_ids:
+        stored = {
+            row.client_scan_id: row
+            for row in Attendance.query.filter(Attendance.client_scan_id.in_(client_scan_ids))
+        }
+    first_index = {}
+    repeated = []
+    new_scans = []
+    for scan in scans:
+        _, index, barcode, _, client_scan_id = scan
+        row = stored.get(client_scan_id)
+        if row is not None:
+            result = build_scan_result(people[barcode], row.attendance_type, row.status, row.timestamp, row.location)
+            result.update(index=index, duplicate=True)
+            results[index] = result
+        elif client_scan_id in first_index:
+            repeated.append((index, first_index[client_scan_id]))
         else:
-            status = 'on_time'
-        
-        # Jika setting must_present_for_leave aktif, cek apakah ini absen masuk
-        if setting.must_present_for_leave and attendance_type == 'out':
-            return jsonify({
-                'success': False, 
-                'message': 'Anda harus absen masuk terlebih dahulu sebelum bisa absen pulang!'
-            })
-    
-    # Buat record absensi
-    attendance = Attendance(
-        barcode=barcode,
-        attendance_type=attendance_type,
-        timestamp=current_datetime,
-        location=location,
-        status=status
-    )
-    
-    db.session.add(attendance)
-    db.session.commit()
-    
-    # Tentukan pesan berdasarkan status
-    if status == 'on_time':
-        message = f'{person_type} {person_name} - Anda Tepat Waktu'
-    else:
-        message = f'{person_type} {person_name} - Anda Tidak Tepat Waktu'
-    
+            if client_scan_id:
+                first_index[client_scan_id] = index
+            new_scans.append(scan)
+
+    if new_scans:
+        setting = settings_store.get()
+
+        committed = [
+            (scanned_at, barcode, location, people[barcode].person_id)
+            for scanned_at, _, barcode, location, _ in new_scans
+        ]
+        decisions = apply_scans(committed, setting, [scan[4] for scan in new_scans])
+
+        for (scanned_at, index, barcode, location, _), (attendance_type, status) in zip(new_scans, decisions):
+            result = build_scan_result(people[barcode], attendance_type, status, scanned_at, location)
+            result['index'] = index
+            results[index] = result
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Kiriman yang sama sedang diproses request lain; kiosk mengirim ulang
+            # nanti dan saat itu scan yang sudah tersimpan dikenali sebagai duplikat
+            db.session.rollback()
+            return jsonify({'success': False, 'message': 'Scan yang sama sedang diproses, coba lagi!'}), 409
+        scans_committed(committed, decisions)
+
+    for index, original in repeated:
+        results[index] = dict(results[original], index=index, duplicate=True)
+
     return jsonify({
         'success': True,
-        'message': message,
-        'person_name': person_name,
-        'person_type': person_type,
-        'attendance_type': 'Masuk' if attendance_type == 'in' else 'Pulang',
-        'status': 'Tepat Waktu' if status == 'on_time' else 'Tidak Tepat Waktu',
-        'time': current_datetime.strftime('%H:%M:%S'),
-        'date': current_datetime.strftime('%Y-%m-%d'),
-        'location': location
-    })
\ No newline at end of file
+        'processed': sum(1 for result in results if result['success'] and not result.get('duplicate')),
+        'results': results
+    })
+
+
+@attendance_bp.route('/api/scan/writer')
+def writer_health():
+    # Status antrean write-behind (untuk health check tanpa login);
+    # pesan error database hanya ditampilkan ke user yang login
+    health = attendance_writer.health()
+    if not current_user.is_authenticated:
+        health.pop('last_error')
+    return jsonify(health)
+
+@attendance_bp.route('/api/scan/debounce')
+@login_required
+def debounce_stats():
+    # Jumlah scan ganda yang ditahan sebelum menyentuh database
+    return jsonify(scan_debouncer.stats())
+
+@attendance_bp.route('/api/scan/writer/flush', methods=['POST'])
+@login_required
+def writer_flush():
+    written = attendance_writer.flush()
+    return jsonify({'success': True, 'written': written, **attendance_writer.health()})
+
+def _check_roster_access():
+    # Roster berisi nama semua guru/siswa: hanya untuk user login atau kiosk dengan token
+    if current_user.is_authenticated:
+        return
+    token = current_app.config['ROSTER_SYNC_TOKEN']
+    supplied = request.headers.get('X-Kiosk-Token', '')
+    if not token or not hmac.compare_digest(supplied, token):
+        abort(401)
+
+def _roster_response(payload):
+    if request.if_none_match.contains_weak(payload.etag):
+        response = Response(status=304)
+    else:
+        response = Response(payload.body, mimetype='application/json')
+        if payload.gzipped is not None and request.accept_encodings['gzip']:
+            response.set_data(payload.gzipped)
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(payload.etag, weak=True)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@attendance_bp.route('/api/roster')
+def roster_snapshot():
+    """Snapshot roster: {version, fields, people: [[barcode, name, type], ...]}"""
+    _check_roster_access()
+    return _roster_response(roster_sync.snapshot())
+
+@attendance_bp.route('/api/roster/changes')
+def roster_changes():
+    """Perubahan roster sejak ?since=<versi>: {version, upsert, delete} atau {version, reset}"""
+    _check_roster_access()
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({'success': False, 'message': 'Parameter since tidak valid!'}), 400
+    return _roster_response(roster_sync.delta(since))
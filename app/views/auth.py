@@ -4,12 +4,14 @@ from app import login_manager
 from app.models import db
 from app.models.user import User
 from app.forms.auth import LoginForm, UserForm
+from app.services.identity import user_cache
 
 auth_bp = Blueprint('auth', __name__)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Identitas user diambil dari cache supaya tidak ada query users di setiap request
+    return user_cache.load(int(user_id))
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
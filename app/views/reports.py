@@ -1,18 +1,22 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, abort, Response
 from flask_login import login_required
-from app.models import db
+from app.models import db, read_replica
 from app.models.attendance import Attendance
-from app.models.teacher import Teacher
+from app.models.person import Person
+from app.models.rollup import AttendanceRollup
 from app.models.student import Student
-from app.models.setting import Setting
+from app.services.archive import attendance_archive
+from app.services.class_report import NO_CLASS, class_report
+from app.services.directory import PERSON_TYPE_LABELS
+from app.services.events import live_feed
+from app.services.export import export_response
+from app.services.scanning import live_totals
 from datetime import datetime, date, timedelta
-from collections import defaultdict
+from itertools import islice
 
 reports_bp = Blueprint('reports', __name__)
 
-@reports_bp.route('/attendance')
-@login_required
-def attendance_report():
+def _report_range():
     # Ambil parameter filter
     date_filter = request.args.get('date_filter', 'daily')  # daily, monthly, yearly
     start_date = request.args.get('start_date')
@@ -24,121 +28,180 @@ def attendance_report():
     if not end_date and date_filter == 'daily':
         end_date = date.today().strftime('%Y-%m-%d')
     
-    # Konversi string ke objek datetime
+    # Konversi string ke objek datetime; batas akhir eksklusif (awal hari berikutnya)
     if start_date:
         start_date_obj = datetime.strptime(start_date, '%Y-%m-%d')
     else:
         start_date_obj = datetime.combine(date.today().replace(day=1), datetime.min.time())
     
     if end_date:
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
+        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
     else:
-        end_date_obj = datetime.combine(date.today(), datetime.max.time())
+        end_date_obj = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
     
-    # Query data absensi
-    attendances = Attendance.query.filter(
-        Attendance.timestamp.between(start_date_obj, end_date_obj)
-    ).all()
+    return date_filter, start_date, end_date, start_date_obj, end_date_obj
+
+def _rollup_stats(start_day, end_day):
+    # Jumlahkan rekap harian per orang pada suatu rentang tanggal
+    return db.session.query(
+        Person.name,
+        db.func.sum(AttendanceRollup.on_time_count),
+        db.func.sum(AttendanceRollup.late_count)
+    ).select_from(AttendanceRollup).outerjoin(
+        Person, AttendanceRollup.person_id == Person.id
+    ).filter(
+        AttendanceRollup.day.between(start_day, end_day)
+    ).group_by(Person.name).order_by(Person.name)
+
+def _day_range():
+    # Rentang hari laporan kelas (inklusif), default hari ini
+    start_date = request.args.get('start_date') or date.today().isoformat()
+    end_date = request.args.get('end_date') or start_date
+    try:
+        start_day = date.fromisoformat(start_date)
+        end_day = date.fromisoformat(end_date)
+    except ValueError:
+        abort(400)
+    if end_day < start_day:
+        start_day, end_day = end_day, start_day
+    return start_day, end_day
+
+@reports_bp.route('/attendance')
+@login_required
+@read_replica
+def attendance_report():
+    date_filter, start_date, end_date, start_date_obj, end_date_obj = _report_range()
+    in_range = db.and_(
+        Attendance.timestamp >= start_date_obj,
+        Attendance.timestamp < end_date_obj
+    )
+    
+    # Hitung total tepat waktu/terlambat langsung di database
+    total_count, on_time_count = db.session.query(
+        db.func.count(Attendance.id),
+        db.func.coalesce(db.func.sum(db.case((Attendance.status == 'on_time', 1), else_=0)), 0)
+    ).filter(in_range).one()
     
-    # Kelompokkan data berdasarkan status
-    on_time_count = 0
-    late_count = 0
+    # Tambahkan baris yang sudah dipindahkan ke arsip tahunan
+    archived = attendance_archive.covers(start_date_obj, end_date_obj)
+    if archived:
+        archived_total, archived_on_time = attendance_archive.counts(start_date_obj, end_date_obj)
+        total_count += archived_total
+        on_time_count += archived_on_time
+    late_count = total_count - on_time_count
     
-    for attendance in attendances:
-        if attendance.status == 'on_time':
-            on_time_count += 1
-        else:
-            late_count += 1
+    # Keyset pagination berdasarkan (timestamp, id) dari baris terakhir halaman sebelumnya
+    page_size = current_app.config['REPORT_PAGE_SIZE']
+    after_ts = request.args.get('after_ts')
+    after_id = request.args.get('after_id', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    
+    query = db.session.query(
+        Attendance.id,
+        Attendance.attendance_type,
+        Attendance.timestamp,
+        Attendance.status,
+        Attendance.location,
+        Person.name,
+        Person.person_type
+    ).outerjoin(
+        Person, Attendance.person_id == Person.id
+    ).filter(in_range)
+    
+    after = None
+    if after_ts and after_id is not None:
+        try:
+            after = (datetime.fromisoformat(after_ts), after_id)
+        except ValueError:
+            abort(400)
+        query = query.filter(db.tuple_(Attendance.timestamp, Attendance.id) > after)
+    
+    rows = query.order_by(Attendance.timestamp, Attendance.id).limit(page_size + 1).all()
+    if archived:
+        # Gabungkan dengan baris arsip yang terurut dengan kunci yang sama
+        merged = attendance_archive.merge(start_date_obj, end_date_obj, rows, after=after)
+        rows = list(islice(merged, page_size + 1))
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
     
     # Ambil detail absensi
     attendance_details = []
-    for attendance in attendances:
-        # Dapatkan nama berdasarkan barcode
-        teacher = Teacher.query.filter_by(barcode=attendance.barcode).first()
-        student = Student.query.filter_by(barcode=attendance.barcode).first()
-        
-        person_name = 'Unknown'
-        person_type = 'Unknown'
-        
-        if teacher:
-            person_name = teacher.name
-            person_type = 'Guru'
-        elif student:
-            person_name = student.name
-            person_type = 'Siswa'
-        
+    for row in rows:
         attendance_details.append({
-            'person_name': person_name,
-            'person_type': person_type,
-            'attendance_type': 'Masuk' if attendance.attendance_type == 'in' else 'Pulang',
-            'timestamp': attendance.timestamp,
-            'status': 'Tepat Waktu' if attendance.status == 'on_time' else 'Tidak Tepat Waktu',
-            'location': attendance.location
+            'person_name': row.name or 'Unknown',
+            'person_type': PERSON_TYPE_LABELS.get(row.person_type, 'Unknown'),
+            'attendance_type': 'Masuk' if row.attendance_type == 'in' else 'Pulang',
+            'timestamp': row.timestamp,
+            'status': 'Tepat Waktu' if row.status == 'on_time' else 'Tidak Tepat Waktu',
+            'location': row.location
         })
     
+    next_url = None
+    if has_next:
+        next_url = url_for('reports.attendance_report',
+                           date_filter=date_filter,
+                           start_date=start_date,
+                           end_date=end_date,
+                           after_ts=rows[-1].timestamp.isoformat(),
+                           after_id=rows[-1].id,
+                           offset=offset + len(rows))
+    first_url = None
+    if after_ts:
+        first_url = url_for('reports.attendance_report',
+                            date_filter=date_filter,
+                            start_date=start_date,
+                            end_date=end_date)
+    
     return render_template('reports/attendance.html', 
                          attendances=attendance_details,
                          on_time_count=on_time_count,
                          late_count=late_count,
-                         total_count=len(attendances),
+                         total_count=total_count,
+                         offset=offset,
+                         next_url=next_url,
+                         first_url=first_url,
                          date_filter=date_filter,
                          start_date=start_date,
                          end_date=end_date)
 
+@reports_bp.route('/attendance/live')
+@login_required
+def attendance_live():
+    # Stream Server-Sent Events berisi scan baru dan total hari ini.
+    # Total awal dihitung sebelum subscribe supaya error database tidak meninggalkan slot terpakai
+    initial = [('totals', live_totals())]
+    subscription = live_feed.subscribe()
+    if subscription is None:
+        return Response('Terlalu banyak koneksi live.', status=503, headers={'Retry-After': '30'})
+    
+    # Generator tidak memakai app context sehingga sesi database sudah dilepas saat streaming
+    response = Response(
+        live_feed.stream(subscription, initial),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Slot juga dilepas jika response ditutup sebelum body mulai dikirim
+    response.call_on_close(lambda: live_feed.unsubscribe(subscription))
+    return response
+
 @reports_bp.route('/rekap-attendance')
 @login_required
+@read_replica
 def rekap_attendance():
     # Rekap absensi harian
     today = date.today()
     start_of_month = today.replace(day=1)
     start_of_year = today.replace(month=1, day=1)
     
-    # Rekap harian
-    daily_start = datetime.combine(today, datetime.min.time())
-    daily_end = datetime.combine(today, datetime.max.time())
-    daily_attendances = Attendance.query.filter(
-        Attendance.timestamp.between(daily_start, daily_end)
-    ).all()
-    
-    # Rekap bulanan
-    monthly_start = datetime.combine(start_of_month, datetime.min.time())
-    monthly_end = datetime.combine(today, datetime.max.time())
-    monthly_attendances = Attendance.query.filter(
-        Attendance.timestamp.between(monthly_start, monthly_end)
-    ).all()
-    
-    # Rekap tahunan
-    yearly_start = datetime.combine(start_of_year, datetime.min.time())
-    yearly_end = datetime.combine(today, datetime.max.time())
-    yearly_attendances = Attendance.query.filter(
-        Attendance.timestamp.between(yearly_start, yearly_end)
-    ).all()
+    def count_attendance_stats(start_day, end_day):
+        stats = {}
+        for person_name, present, late in _rollup_stats(start_day, end_day):
+            stats[person_name or 'Unknown'] = {'present': present, 'late': late}
+        return stats
     
-    # Fungsi untuk menghitung statistik
-    def count_attendance_stats(attendances):
-        stats = defaultdict(lambda: {'present': 0, 'late': 0})
-        
-        for attendance in attendances:
-            # Dapatkan nama berdasarkan barcode
-            teacher = Teacher.query.filter_by(barcode=attendance.barcode).first()
-            student = Student.query.filter_by(barcode=attendance.barcode).first()
-            
-            person_name = 'Unknown'
-            if teacher:
-                person_name = teacher.name
-            elif student:
-                person_name = student.name
-            
-            if attendance.status == 'on_time':
-                stats[person_name]['present'] += 1
-            else:
-                stats[person_name]['late'] += 1
-        
-        return dict(stats)
-    
-    daily_stats = count_attendance_stats(daily_attendances)
-    monthly_stats = count_attendance_stats(monthly_attendances)
-    yearly_stats = count_attendance_stats(yearly_attendances)
+    daily_stats = count_attendance_stats(today, today)
+    monthly_stats = count_attendance_stats(start_of_month, today)
+    yearly_stats = count_attendance_stats(start_of_year, today)
     
     return render_template('reports/rekap.html',
                          daily_stats=daily_stats,
@@ -146,4 +209,123 @@ def rekap_attendance():
                          yearly_stats=yearly_stats,
                          today=today,
                          start_of_month=start_of_month,
-                         start_of_year=start_of_year)
\ No newline at end of file
+                         start_of_year=start_of_year)
+
+@reports_bp.route('/attendance/export.<any(csv, xlsx):fmt>')
+@login_required
+@read_replica
+def export_attendance(fmt):
+    date_filter, start_date, end_date, start_date_obj, end_date_obj = _report_range()
+    
+    # Baca baris per potong langsung dari cursor database
+    query = db.select(
+        Attendance.id,
+        Attendance.attendance_type,
+        Attendance.timestamp,
+        Attendance.status,
+        Attendance.location,
+        Person.name,
+        Person.person_type
+    ).outerjoin(
+        Person, Attendance.person_id == Person.id
+    ).where(
+        Attendance.timestamp >= start_date_obj,
+        Attendance.timestamp < end_date_obj
+    ).order_by(Attendance.timestamp, Attendance.id).execution_options(yield_per=1000)
+    
+    def generate_rows():
+        rows = attendance_archive.merge(start_date_obj, end_date_obj, db.session.execute(query))
+        for number, row in enumerate(rows, 1):
+            yield [
+                number,
+                row.name or 'Unknown',
+                PERSON_TYPE_LABELS.get(row.person_type, 'Unknown'),
+                'Masuk' if row.attendance_type == 'in' else 'Pulang',
+                row.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                'Tepat Waktu' if row.status == 'on_time' else 'Tidak Tepat Waktu',
+                row.location
+            ]
+    
+    filename = f"laporan-absensi-{start_date_obj:%Y%m%d}-{end_date_obj - timedelta(days=1):%Y%m%d}"
+    return export_response(fmt, filename, 'Laporan Absensi',
+                           ['No', 'Nama', 'Tipe', 'Jenis Absensi', 'Waktu', 'Status', 'Lokasi'],
+                           generate_rows())
+
+@reports_bp.route('/rekap-attendance/export.<any(csv, xlsx):fmt>')
+@login_required
+@read_replica
+def export_rekap(fmt):
+    period = request.args.get('period', 'daily')  # daily, monthly, yearly
+    today = date.today()
+    if period == 'yearly':
+        start_day = today.replace(month=1, day=1)
+    elif period == 'monthly':
+        start_day = today.replace(day=1)
+    else:
+        start_day = today
+    
+    query = _rollup_stats(start_day, today).execution_options(yield_per=1000)
+    
+    def generate_rows():
+        for person_name, present, late in query:
+            yield [person_name or 'Unknown', present, late]
+    
+    filename = f"rekap-absensi-{start_day:%Y%m%d}-{today:%Y%m%d}"
+    return export_response(fmt, filename, 'Rekap Absensi',
+                           ['Nama', 'Jumlah Hadir Tepat Waktu', 'Jumlah Tidak Tepat Waktu'],
+                           generate_rows())
+
+@reports_bp.route('/attendance/classes')
+@login_required
+@read_replica
+def class_summary():
+    # Rekap hadir/terlambat/tidak hadir siswa per kelas
+    start_day, end_day = _day_range()
+    school_days, classes = class_report.summary(start_day, end_day)
+    totals = {
+        'students': sum(row.students for row in classes),
+        'on_time': sum(row.on_time for row in classes),
+        'late': sum(row.late for row in classes),
+        'absent': sum(row.absent for row in classes),
+    }
+    return render_template('reports/classes.html',
+                         classes=classes,
+                         totals=totals,
+                         school_days=school_days,
+                         start_day=start_day,
+                         end_day=end_day)
+
+@reports_bp.route('/attendance/absentees')
+@login_required
+@read_replica
+def absentees():
+    # Daftar siswa yang tidak melakukan scan pada hari sekolah
+    start_day, end_day = _day_range()
+    class_name = request.args.get('class_name', '').strip() or None
+    class_names = db.session.scalars(
+        db.select(Student.class_name).where(Student.class_name.isnot(None)).distinct().order_by(Student.class_name)
+    ).all()
+    return render_template('reports/absentees.html',
+                         absentees=class_report.absentees(start_day, end_day, class_name),
+                         school_days=class_report.school_days(start_day, end_day),
+                         class_name=class_name,
+                         class_names=class_names,
+                         no_class=NO_CLASS,
+                         start_day=start_day,
+                         end_day=end_day)
+
+@reports_bp.route('/attendance/absentees/export.<any(csv, xlsx):fmt>')
+@login_required
+@read_replica
+def export_absentees(fmt):
+    start_day, end_day = _day_range()
+    class_name = request.args.get('class_name', '').strip() or None
+    
+    def generate_rows():
+        for number, row in enumerate(class_report.absentees(start_day, end_day, class_name), 1):
+            yield [number, row.nis, row.name, row.class_name or NO_CLASS, row.absent_days]
+    
+    filename = f"siswa-tidak-hadir-{start_day:%Y%m%d}-{end_day:%Y%m%d}"
+    return export_response(fmt, filename, 'Siswa Tidak Hadir',
+                           ['No', 'NIS', 'Nama', 'Kelas', 'Jumlah Hari Tidak Hadir'],
+                           generate_rows())
@@ -0,0 +1,252 @@
+"""Benchmark beban dan latensi untuk jalur scan dan laporan.
+
+Contoh pemakaian (dari root repository):
+
+    python -m benchmarks.run                       # SQLite sementara
+    python -m benchmarks.run --database-url postgresql://.../absensi_bench
+    python -m benchmarks.run --update-baseline     # simpan hasil sebagai baseline
+
+Setiap skenario dijalankan bersamaan oleh beberapa thread dengan Flask test
+client. Hasilnya berupa latensi p50/p95/p99, throughput, dan rata-rata
+jumlah query SQL per request. Program keluar dengan kode 1 jika ada
+skenario yang lebih buruk dari baseline melewati toleransi.
+
+SQLite hanya mengizinkan satu penulis dan request laporan saling berebut
+GIL serta file database, sehingga dengan banyak thread yang terukur adalah
+antrean, bukan biaya request. Karena itu default --concurrency untuk SQLite
+adalah 1 (baseline.json direkam dengan nilai ini); uji konkurensi sebaiknya
+memakai PostgreSQL (default 8 thread).
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Kenaikan jumlah query per request yang masih ditoleransi
+QUERY_TOLERANCE = 0.5
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    # Metode nearest-rank
+    values = sorted(values)
+    index = max(0, math.ceil(pct / 100.0 * len(values)) - 1)
+    return values[index]
+
+class QueryCounter:
+    """Menghitung query SQL per thread melalui event SQLAlchemy"""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+def build_app(database_url):
+    from app import create_app
+    from app.config import Config
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+        if database_url.startswith('sqlite'):
+            SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+
+    return create_app(BenchmarkConfig)
+
+def prepare_database(app, args):
+    from app.models import db
+    from app.models.person import Person
+    from app.models.user import User
+    from benchmarks.seed import seed_school
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        user = User(username='benchmark', email='benchmark@example.com', role='admin')
+        user.set_password('benchmark')
+        db.session.add(user)
+        db.session.commit()
+
+        started = time.perf_counter()
+        seed_school(students=args.students, teachers=args.teachers, days=args.days, seed=args.seed)
+        print(f'Data sintetis dibuat dalam {time.perf_counter() - started:.1f} detik '
+              f'({Person.query.count()} orang, {args.days} hari sekolah)')
+
+        return [barcode for barcode, in db.session.query(Person.barcode)]
+
+def scenarios(barcodes, rng):
+    """Skenario benchmark: nama -> (skenario laporan/perlu login, fungsi request)"""
+    def scan(client):
+        return client.post('/scan', data={'barcode': rng.choice(barcodes), 'location': 'Benchmark'})
+
+    def api_scan(client):
+        return client.post('/api/scan', json={'barcode': rng.choice(barcodes), 'location': 'Benchmark'})
+
+    def attendance_report(client):
+        return client.get('/attendance?date_filter=monthly')
+
+    def rekap_attendance(client):
+        return client.get('/rekap-attendance')
+
+    return {
+        'scan': (False, scan),
+        'api_scan': (False, api_scan),
+        'attendance_report': (True, attendance_report),
+        'rekap_attendance': (True, rekap_attendance),
+    }
+
+def run_scenario(app, counter, login, request_fn, requests, concurrency):
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            if login:
+                local.client.post('/login', data={'username': 'benchmark', 'password': 'benchmark'})
+        return local.client
+
+    def one(_):
+        c = client()
+        counter.reset()
+        started = time.perf_counter()
+        response = request_fn(c)
+        elapsed = time.perf_counter() - started
+        return elapsed, counter.count, response.status_code < 400
+
+    # Pemanasan supaya cache dan koneksi tidak ikut terukur
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(concurrency)))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = [elapsed * 1000 for elapsed, _, _ in samples]
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, _, ok in samples if not ok),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'throughput_rps': round(requests / wall, 1),
+        'queries_per_request': round(sum(queries for _, queries, _ in samples) / len(samples), 2),
+    }
+
+def compare(results, baseline, tolerance):
+    """Bandingkan hasil dengan baseline; kembalikan list pesan regresi"""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get('scenarios', {}).get(name)
+        if not expected:
+            continue
+        if result['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']}ms > baseline {expected['p95_ms']}ms")
+        if result['throughput_rps'] < expected['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput_rps']}/s < baseline {expected['throughput_rps']}/s")
+        if result['queries_per_request'] > expected['queries_per_request'] + QUERY_TOLERANCE:
+            regressions.append(f"{name}: {result['queries_per_request']} query/request > baseline {expected['queries_per_request']}")
+        if result['errors']:
+            regressions.append(f"{name}: {result['errors']} request gagal")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='Default: file SQLite sementara')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--teachers', type=int, default=100)
+    parser.add_argument('--days', type=int, default=120, help='Jumlah hari sekolah yang diisi absensi')
+    parser.add_argument('--requests', type=int, default=400, help='Jumlah request per skenario scan')
+    parser.add_argument('--report-requests', type=int, default=40, help='Jumlah request per skenario laporan')
+    parser.add_argument('--concurrency', type=int, help='Default: 1 untuk SQLite, 8 untuk database lain')
+    parser.add_argument('--scenario', action='append', help='Jalankan skenario tertentu saja (boleh berulang)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Toleransi regresi latensi/throughput')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON')
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='absensi-bench-'), 'bench.db')
+    if args.concurrency is None:
+        args.concurrency = 1 if database_url.startswith('sqlite') else 8
+
+    app = build_app(database_url)
+    barcodes = prepare_database(app, args)
+
+    from app.models import db
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+
+    rng = random.Random(args.seed)
+    results = {}
+    for name, (login, request_fn) in scenarios(barcodes, rng).items():
+        if args.scenario and name not in args.scenario:
+            continue
+        requests = args.report_requests if login else args.requests
+        results[name] = run_scenario(app, counter, login, request_fn, requests, args.concurrency)
+        print(f"{name:20s} p50={results[name]['p50_ms']:8.2f}ms p95={results[name]['p95_ms']:8.2f}ms "
+              f"p99={results[name]['p99_ms']:8.2f}ms {results[name]['throughput_rps']:8.1f} req/s "
+              f"{results[name]['queries_per_request']:6.2f} query/req")
+
+    report = {
+        'database': database_url.split(':', 1)[0],
+        'params': {
+            'students': args.students,
+            'teachers': args.teachers,
+            'days': args.days,
+            'requests': args.requests,
+            'report_requests': args.report_requests,
+            'concurrency': args.concurrency,
+        },
+        'scenarios': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f'Baseline disimpan ke {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('Baseline belum ada; jalankan dengan --update-baseline.')
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('params') != report['params'] or baseline.get('database') != report['database']:
+        print('Peringatan: parameter benchmark berbeda dengan baseline, perbandingan mungkin tidak sebanding.')
+
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print(f'REGRESI {message}')
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Generator data sekolah sintetis untuk benchmark.
+
+Membuat guru, siswa, indeks people, serta absensi masuk/pulang untuk
+sejumlah hari sekolah terakhir, lalu membangun ulang presensi dan rekap
+harian dari data tersebut.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+from app.models import db
+from app.models.attendance import Attendance
+from app.models.person import Person
+from app.models.presence import DailyPresence
+from app.models.rollup import AttendanceRollup
+from app.models.student import Student
+from app.models.teacher import Teacher
+
+CHUNK_SIZE = 5000
+CLASSES = [f'{grade}-{section}' for grade in ('X', 'XI', 'XII') for section in 'ABCDEFGH']
+
+def _insert_chunked(table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[start:start + CHUNK_SIZE])
+
+def school_days(days, today=None):
+    """Hari sekolah (Senin-Jumat) sebanyak `days` sebelum hari ini"""
+    day = (today or date.today()) - timedelta(days=1)
+    result = []
+    while len(result) < days:
+        if day.weekday() < 5:
+            result.append(day)
+        day -= timedelta(days=1)
+    return sorted(result)
+
+def seed_school(students=2000, teachers=100, days=180, attendance_rate=0.95, seed=42):
+    """Isi database dengan sekolah sintetis; kembalikan list barcode yang dibuat"""
+    rng = random.Random(seed)
+
+    _insert_chunked(Teacher.__table__, [{
+        'nip': f'{198000000 + i}',
+        'name': f'Guru {i:04d}',
+        'barcode': f'T{i:011d}',
+    } for i in range(teachers)])
+    _insert_chunked(Student.__table__, [{
+        'nis': f'{100000 + i}',
+        'name': f'Siswa {i:05d}',
+        'class_name': CLASSES[i % len(CLASSES)],
+        'barcode': f'S{i:011d}',
+    } for i in range(students)])
+    Person.rebuild()
+    db.session.commit()
+
+    people = db.session.query(Person.barcode, Person.id).all()
+    day_list = school_days(days)
+    rows = []
+    for day in day_list:
+        for barcode, person_id in people:
+            if rng.random() > attendance_rate:
+                continue
+            check_in = datetime.combine(day, time(6, 30)) + timedelta(seconds=rng.randint(0, 3600))
+            check_out = datetime.combine(day, time(15, 0)) + timedelta(seconds=rng.randint(0, 5400))
+            rows.append({
+                'barcode': barcode,
+                'person_id': person_id,
+                'attendance_type': 'in',
+                'timestamp': check_in,
+                'location': 'Gerbang Utama',
+                'status': 'late' if check_in.time() > time(7, 15) else 'on_time',
+            })
+            rows.append({
+                'barcode': barcode,
+                'person_id': person_id,
+                'attendance_type': 'out',
+                'timestamp': check_out,
+                'location': 'Gerbang Utama',
+                'status': 'late' if check_out.time() > time(16, 0) else 'on_time',
+            })
+        if len(rows) >= CHUNK_SIZE * 10:
+            _insert_chunked(Attendance.__table__, rows)
+            rows = []
+    _insert_chunked(Attendance.__table__, rows)
+
+    if day_list:
+        DailyPresence.rebuild(day_list[0], day_list[-1])
+        AttendanceRollup.rebuild(day_list[0], day_list[-1])
+    db.session.commit()
+
+    return [barcode for barcode, _ in people]
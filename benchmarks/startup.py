@@ -0,0 +1,68 @@
+"""Ukur waktu cold start aplikasi (import + create_app) di proses baru.
+
+Contoh pemakaian (dari root repository):
+
+    python -m benchmarks.startup                 # 10 proses, batas 1500 ms
+    python -m benchmarks.startup --runs 20 --max-ms 800
+
+Setiap percobaan menjalankan interpreter baru seperti worker gunicorn yang
+baru di-boot, lalu mencatat waktu sampai create_app() selesai dan jumlah
+koneksi database yang dibuka selama itu. Startup tidak boleh menyentuh
+database sama sekali, jadi program keluar dengan kode 1 jika ada koneksi
+yang dibuka atau median waktu startup melewati --max-ms.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, time
+started = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+connections = []
+event.listen(Pool, 'connect', lambda *args: connections.append(1))
+from app import create_app
+create_app()
+print(json.dumps({'ms': (time.perf_counter() - started) * 1000, 'connections': len(connections)}))
+'''
+
+def measure(database_url):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=1500, help='Batas median waktu startup')
+    parser.add_argument('--database-url', help='Default: file SQLite yang tidak pernah dibuat')
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'absensi-startup', 'none.db')
+    samples = [measure(database_url) for _ in range(args.runs)]
+    timings = [sample['ms'] for sample in samples]
+    connections = max(sample['connections'] for sample in samples)
+    median = statistics.median(timings)
+    print(f'startup median={median:.1f}ms min={min(timings):.1f}ms max={max(timings):.1f}ms '
+          f'koneksi database={connections} ({args.runs} proses)')
+
+    failed = False
+    if connections:
+        print('REGRESI create_app membuka koneksi database saat startup')
+        failed = True
+    if median > args.max_ms:
+        print(f'REGRESI median startup {median:.1f}ms > batas {args.max_ms}ms')
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Konfigurasi gunicorn untuk produksi: gunicorn -c gunicorn.conf.py wsgi:app
+
+Default memakai worker gevent: setiap request scan berjalan sebagai greenlet,
+sehingga saat satu request menunggu database worker tetap melayani kiosk
+lain dan koneksi feed live (SSE) tidak menghabiskan thread. Driver psycopg2
+dibuat kooperatif dengan psycogreen. Pool koneksi per worker tetap dibatasi
+DB_POOL_SIZE/DB_MAX_OVERFLOW (atau PgBouncer dengan DB_PGBOUNCER=1); greenlet
+yang tidak kebagian koneksi menunggu di pool tanpa memblokir worker.
+
+GUNICORN_WORKER_CLASS=gthread memakai thread biasa tanpa monkey patching.
+"""
+import multiprocessing
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+
+if worker_class == 'gevent':
+    # Patch sebelum aplikasi di-preload supaya socket, lock, dan queue di
+    # modul aplikasi sudah kooperatif sejak import
+    from gevent import monkey
+    monkey.patch_all()
+
+    from app.config import Config
+    if Config.SQLALCHEMY_DATABASE_URI.startswith('postgresql'):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS') or 1000)  # gevent
+threads = int(os.environ.get('GUNICORN_THREADS') or 8)  # gthread
+
+# Aplikasi dimuat sekali di master lalu di-fork (create_app tidak membuka koneksi database)
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 30)
+# Waktu untuk flush antrean write-behind saat worker dihentikan
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE') or 5)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 0)
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER') or 0)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+def when_ready(server):
+    from app.config import Config
+    if workers > 1 and not Config.LIVE_FEED_REDIS_URL:
+        # Tanpa channel bersama setiap dashboard hanya menerima scan dari worker yang melayaninya
+        server.log.warning('Feed live berjalan per worker: set LIVE_FEED_REDIS_URL atau GUNICORN_WORKERS=1')
+
+def post_fork(server, worker):
+    # Koneksi pool yang mungkin dibuka di master tidak boleh dipakai bersama antar proses
+    from app.models import db
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,54 @@
+"""backfill people
+
+Revision ID: b7c4e21f9a03
+Revises: 1e0786d3b2d8
+Create Date: 2026-10-18 19:20:04.512830
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c4e21f9a03'
+down_revision = '1e0786d3b2d8'
+branch_labels = None
+depends_on = None
+
+# Definisi tabel minimal untuk migrasi data, tidak bergantung pada model aplikasi
+people = sa.table('people',
+    sa.column('id', sa.Integer),
+    sa.column('barcode', sa.String),
+    sa.column('name', sa.String),
+    sa.column('person_type', sa.String),
+    sa.column('ref_id', sa.Integer),
+)
+sources = {
+    'teacher': sa.table('teachers', sa.column('id', sa.Integer), sa.column('barcode', sa.String), sa.column('name', sa.String)),
+    'student': sa.table('students', sa.column('id', sa.Integer), sa.column('barcode', sa.String), sa.column('name', sa.String)),
+}
+attendances = sa.table('attendances', sa.column('barcode', sa.String), sa.column('person_id', sa.Integer))
+roster_changes = sa.table('roster_changes', sa.column('action', sa.String), sa.column('changed_at', sa.DateTime))
+
+
+def upgrade():
+    # Lengkapi baris people yang belum ada (mis. data yang dibuat saat revisi 37d08cee5bd4
+    # sudah dijalankan tetapi kode lama masih berjalan) dan minta kiosk mengambil roster baru
+    for person_type, source in sources.items():
+        missing = sa.select(source.c.barcode, source.c.name, sa.literal(person_type), source.c.id).where(
+            ~sa.exists().where(people.c.person_type == person_type, people.c.ref_id == source.c.id)
+        )
+        op.execute(people.insert().from_select(['barcode', 'name', 'person_type', 'ref_id'], missing))
+
+    op.execute(attendances.update().where(attendances.c.person_id.is_(None)).values(
+        person_id=sa.select(people.c.id).where(people.c.barcode == attendances.c.barcode).scalar_subquery()
+    ))
+
+    # Kiosk wajib mengambil snapshot roster baru
+    op.execute(roster_changes.insert().values(action='reset', changed_at=datetime.now()))
+
+
+def downgrade():
+    # Data people tetap dipakai revisi sebelumnya; tidak ada yang perlu dibatalkan
+    pass
@@ -0,0 +1,32 @@
+"""settings version
+
+Revision ID: f3e2dfdb12d2
+Revises: 6d7922917259
+Create Date: 2026-10-18 20:02:11.408517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3e2dfdb12d2'
+down_revision = '6d7922917259'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Kolom ditambahkan nullable dulu supaya baris pengaturan yang sudah ada bisa diisi versi 1
+    with op.batch_alter_table('settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=True))
+
+    op.execute(sa.text('UPDATE settings SET version = 1 WHERE version IS NULL'))
+
+    with op.batch_alter_table('settings', schema=None) as batch_op:
+        batch_op.alter_column('version', existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('settings', schema=None) as batch_op:
+        batch_op.drop_column('version')
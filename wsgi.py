@@ -0,0 +1,9 @@
+"""Entry point WSGI untuk produksi.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+run.py tetap dipakai untuk development (server debug Flask).
+"""
+from app import create_app
+
+app = create_app()